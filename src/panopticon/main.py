@@ -1,25 +1,39 @@
 """Repository analysis and security assessment tools."""
 
-from mcp.server.fastmcp import FastMCP, server
+from mcp.server.fastmcp import Context, FastMCP, server
 from mcp.server.fastmcp.resources import types
 from pydantic import BaseModel
+import asyncio
 import os
 import subprocess
-from typing import List, Optional, Union, Dict, Any
+from typing import List, NamedTuple, Optional, Union, Dict, Any
 import tempfile
 import shutil
+import threading
+import uuid
+import time
 from pathlib import Path
 import hashlib
+import configparser
+import functools
+import contextlib
+import copy
 import gitdb
-from git import Repo, GitCommandError
+from git import Git, Repo, GitCommandError, InvalidGitRepositoryError, NoSuchPathError
 import json
+import logging
+import ijson
 from enum import Enum
 import xml.etree.ElementTree as ET
 import platform
 import urllib.request
+import zipfile
 import stat
-from collections import Counter
+from collections import Counter, OrderedDict, deque
 import re
+import signal
+import fcntl
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # def is_libmagic_installed() -> bool:
@@ -70,40 +84,47 @@ from datetime import datetime
 #             print(f"WARNING: Could not install libmagic: {str(e)}")
 #             print("Please install libmagic manually if needed.")
 
-def ensure_dependencies() -> None:
-    """Ensure all required tools are installed."""
-    # First ensure system dependencies
-    # ensure_system_dependencies()
-    
-    # Then check and install PMD
-    if not is_pmd_installed():
-        install_pmd()
-    
-    # Check and install Trivy
-    if not is_trivy_installed():
-        install_trivy()
+# Tools are checked on first use rather than at import, and once found or
+# installed are not checked again; a failed install is retried by the next scan
+CHECKED_TOOLS = set()
+TOOL_INSTALL_LOCKS = {"pmd": threading.Lock(), "trivy": threading.Lock()}
+
+def ensure_tool(name: str, is_installed: Any, install: Any) -> None:
+    """Install a scanner the first time it is needed."""
+    with TOOL_INSTALL_LOCKS[name]:
+        if name in CHECKED_TOOLS:
+            return
+        if not is_installed():
+            try:
+                install()
+            except Exception as e:
+                # The scan itself reports the missing tool
+                logger.warning("Could not install %s: %s", name, e)
+                return
+        CHECKED_TOOLS.add(name)
+
+def ensure_pmd() -> None:
+    """Install PMD if it is missing."""
+    ensure_tool("pmd", is_pmd_installed, install_pmd)
+
+def ensure_trivy() -> None:
+    """Install Trivy if it is missing."""
+    ensure_tool("trivy", is_trivy_installed, install_trivy)
 
 def is_pmd_installed() -> bool:
     """Check if PMD is installed."""
-    try:
-        subprocess.run(["pmd", "--version"], capture_output=True)
-        return True
-    except FileNotFoundError:
-        return False
+    return shutil.which("pmd") is not None
 
 def is_trivy_installed() -> bool:
     """Check if Trivy is installed."""
-    try:
-        subprocess.run(["trivy", "--version"], capture_output=True)
-        return True
-    except FileNotFoundError:
-        return False
+    return shutil.which("trivy") is not None
 
 def install_pmd() -> None:
     """Install PMD."""
     system = platform.system().lower()
     if system == "darwin":  # macOS
-        subprocess.run(["brew", "install", "pmd"], check=True)
+        # Installers must neither read nor write the MCP stdio stream
+        subprocess.run(["brew", "install", "pmd"], check=True, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
     elif system == "linux":
         # Download and install PMD
         pmd_version = "7.0.0-rc4"
@@ -113,10 +134,11 @@ def install_pmd() -> None:
         # Create install directory if it doesn't exist
         os.makedirs(install_dir, exist_ok=True)
         
-        # Download and extract PMD
-        with tempfile.NamedTemporaryFile(suffix='.zip', delete=False) as tmp_file:
-            urllib.request.urlretrieve(pmd_url, tmp_file.name)
-            with zipfile.ZipFile(tmp_file.name, 'r') as zip_ref:
+        # Download and extract PMD; the archive is spooled to an anonymous file that
+        # disappears once extracted, and copied in 1 MiB reads
+        with urllib.request.urlopen(pmd_url) as response, tempfile.TemporaryFile() as tmp_file:
+            shutil.copyfileobj(response, tmp_file, length=1 << 20)
+            with zipfile.ZipFile(tmp_file, 'r') as zip_ref:
                 zip_ref.extractall(install_dir)
         
         # Create symlink to PMD script
@@ -138,40 +160,39 @@ def install_trivy() -> None:
     """Install Trivy."""
     system = platform.system().lower()
     if system == "darwin":  # macOS
-        subprocess.run(["brew", "install", "aquasecurity/trivy/trivy"], check=True)
+        # Installers must neither read nor write the MCP stdio stream
+        subprocess.run(["brew", "install", "aquasecurity/trivy/trivy"], check=True, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
     elif system == "linux":
         # Add Trivy repository and install
         subprocess.run([
-            "sudo", "apt-get", "install", "wget", "apt-transport-https", "gnupg", "lsb-release"
-        ], check=True)
-        
-        # Download and add Trivy GPG key
-        subprocess.run([
-            "wget", "-qO", "-", 
-            "https://aquasecurity.github.io/trivy-repo/deb/public.key", 
-            "|", "gpg", "--dearmor", "|",
-            "sudo", "tee", "/usr/share/keyrings/trivy.gpg", ">", "/dev/null"
-        ], check=True, shell=True)
-        
+            "sudo", "apt-get", "install", "-y", "wget", "apt-transport-https", "gnupg", "lsb-release"
+        ], check=True, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
+
+        # Download and add Trivy GPG key. These are shell pipelines, so they are
+        # passed as strings; with a list only the first word would run.
+        subprocess.run(
+            "wget -qO - https://aquasecurity.github.io/trivy-repo/deb/public.key"
+            " | gpg --dearmor | sudo tee /usr/share/keyrings/trivy.gpg > /dev/null",
+            check=True, shell=True, stdin=subprocess.DEVNULL
+        )
+
         # Add Trivy repository
-        subprocess.run([
-            "echo", "deb [signed-by=/usr/share/keyrings/trivy.gpg]",
-            "https://aquasecurity.github.io/trivy-repo/deb",
-            "$(lsb_release -sc)", "main",
-            "|", "sudo", "tee", "/etc/apt/sources.list.d/trivy.list"
-        ], check=True, shell=True)
+        subprocess.run(
+            "echo \"deb [signed-by=/usr/share/keyrings/trivy.gpg] https://aquasecurity.github.io/trivy-repo/deb"
+            " $(lsb_release -sc) main\" | sudo tee /etc/apt/sources.list.d/trivy.list > /dev/null",
+            check=True, shell=True, stdin=subprocess.DEVNULL
+        )
         
         # Update and install Trivy
-        subprocess.run(["sudo", "apt-get", "update"], check=True)
-        subprocess.run(["sudo", "apt-get", "install", "trivy", "-y"], check=True)
+        subprocess.run(["sudo", "apt-get", "update"], check=True, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
+        subprocess.run(["sudo", "apt-get", "install", "trivy", "-y"], check=True, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
     else:
         raise Exception(f"Unsupported operating system: {system}")
 
-# Initialize dependencies when module loads
-ensure_dependencies()
-
 # Input schemas
-class GitLabCredentials(BaseModel):
+# A plain tuple rather than a model: it is built on every tool call and
+# only ever carries the token
+class GitLabCredentials(NamedTuple):
     api_key: str
     
 class AnalyzeRepositoryInput(BaseModel):
@@ -194,6 +215,7 @@ class DiffInput(BaseModel):
     source: Optional[str] = None  # Branch or commit ID, if None uses current
     target: Optional[str] = None  # Branch or commit ID, if None uses previous commit
     file_path: Optional[str] = None  # Specific file to diff, if None diffs all changes
+    name_only: bool = False  # List changed paths instead of the full patch
     gitlab_credentials: Optional[GitLabCredentials] = None
 
 # Add new input schemas
@@ -220,6 +242,7 @@ mcp = FastMCP(
     dependencies=[
         "GitPython",
         "gitdb",
+        "ijson",
         "requests",
         "pylint",
         "bandit",
@@ -227,6 +250,8 @@ mcp = FastMCP(
     log_level="WARNING"
 )
 
+logger = logging.getLogger(__name__)
+
 LANGUAGE_PATTERNS = {
     'go': {
         'extensions': {'.go'},
@@ -246,6 +271,22 @@ LANGUAGE_PATTERNS = {
     }
 }
 
+# One alternation per language, so a file head is scanned once rather than once per marker
+LANGUAGE_MARKERS = {
+    lang: re.compile("|".join(re.escape(marker) for marker in patterns['markers']).encode())
+    for lang, patterns in LANGUAGE_PATTERNS.items()
+}
+
+# Extension to language, so each file needs one lookup instead of a scan of every language
+EXTENSION_LANGUAGES = {
+    ext: lang
+    for lang, patterns in LANGUAGE_PATTERNS.items()
+    for ext in patterns['extensions']
+}
+
+# Languages making up less of the detected files than this are not analyzed
+MIN_LANGUAGE_CONFIDENCE = 0.1
+
 ANALYSIS_TOOLS = {
     'go': ['gocyclo', 'golangci-lint', 'trivy'],
     'java': ['pmd', 'trivy'],
@@ -253,6 +294,38 @@ ANALYSIS_TOOLS = {
     'javascript': ['eslint', 'trivy']
 }
 
+# One pool shared by every tool call for blocking git and file work
+IO_POOL = ThreadPoolExecutor(max_workers=min(64, (os.cpu_count() or 4) * 4), thread_name_prefix="argus-io")
+
+async def run_blocking(func: Any, *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking call on the shared I/O pool without stalling the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(IO_POOL, functools.partial(func, *args, **kwargs))
+
+# Scanners are CPU-bound on their own, so only a few run at once across all calls
+SCAN_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="argus-scan")
+
+async def run_scan(func: Any, *args: Any) -> Any:
+    """Run a scanner on the bounded scan pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(SCAN_POOL, functools.partial(func, *args))
+
+# File probes fanned out from inside I/O pool tasks; a pool of their own keeps
+# those tasks from waiting on the pool they occupy, and bounds opens across calls
+PROBE_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix="argus-probe")
+
+async def run_scan_component(name: str, func: Any, *args: Any) -> Any:
+    """Run a scanner on the scan pool, reporting its failure as an error result instead of raising."""
+    started = time.monotonic()
+    try:
+        result = await run_scan(func, *args)
+    except Exception as e:
+        logger.warning("%s failed after %.1fs: %s", name, time.monotonic() - started, e)
+        return {"status": "error", "error": str(e)}
+    logger.info("%s finished in %.1fs", name, time.monotonic() - started)
+    return result
+
+@functools.lru_cache(maxsize=1024)
 def get_authenticated_url(repo_url: str, gitlab_credentials: Optional[GitLabCredentials] = None) -> str:
     """Convert repository URL to include authentication if credentials provided."""
     if not gitlab_credentials:
@@ -267,62 +340,668 @@ def get_authenticated_url(repo_url: str, gitlab_credentials: Optional[GitLabCred
     
     return repo_url
 
-def clone_repo(repo_url: str, gitlab_credentials: Optional[GitLabCredentials] = None, branch: Optional[str] = None) -> str:
-    """Clone or retrieve an existing repository from cache and return its path."""
+# Parallelism knobs written into every cached clone; 0 lets git size the
+# worker pools from the number of available cores
+GIT_PARALLEL_CONFIG = {
+    "submodule.fetchJobs": "0",
+    "fetch.parallel": "0",
+    "checkout.workers": "0",
+    "pack.threads": "0",
+}
+
+# Settings for cached clones that are read over and over: no background
+# repacks after fetches, parallel index loads and a commit-graph for history walks
+GIT_CACHE_CONFIG = {
+    "gc.auto": "0",
+    "core.preloadIndex": "true",
+    "core.commitGraph": "true",
+    "fetch.writeCommitGraph": "true",
+}
+
+def get_clone_options(depth: Optional[int] = 1, single_branch: bool = True) -> List[str]:
+    """Build `git clone` options for a cached checkout."""
+    # Blobs outside the checked-out tree are fetched lazily by git on demand
+    options = ["--filter=blob:none", "--no-tags"]
+    if depth:
+        options.append(f"--depth={depth}")
+    options.append("--single-branch" if single_branch else "--no-single-branch")
+    return options
+
+def get_parallel_config_env() -> Dict[str, str]:
+    """Expose the parallelism knobs to a single git invocation via its environment."""
+    env = {"GIT_CONFIG_COUNT": str(len(GIT_PARALLEL_CONFIG))}
+    for index, (key, value) in enumerate(GIT_PARALLEL_CONFIG.items()):
+        env[f"GIT_CONFIG_KEY_{index}"] = key
+        env[f"GIT_CONFIG_VALUE_{index}"] = value
+    return env
+
+def apply_clone_config(repo: Repo) -> None:
+    """Persist the parallelism and cache knobs so later git calls on a cached clone use them."""
+    settings = {**GIT_PARALLEL_CONFIG, **GIT_CACHE_CONFIG}
+    reader = repo.config_reader("repository")
+    missing = [key for key in settings if not reader.has_option(*key.rsplit(".", 1))]
+    if not missing:
+        return
+    with repo.config_writer("repository") as writer:
+        for key in missing:
+            section, option = key.rsplit(".", 1)
+            writer.set_value(section, option, settings[key])
+
+def write_commit_graph(repo: Repo) -> None:
+    """Write a commit-graph so history walks skip parsing commit objects."""
+    # git neither writes nor reads commit-graphs in shallow clones, so this is
+    # only called once a clone has its full history
+    try:
+        repo.git.commit_graph("write", "--reachable")
+    except GitCommandError as e:
+        logger.debug("Could not write commit-graph for %s: %s", repo.git_dir, e)
+
+# Root for cached clones; point it at a tmpfs such as /dev/shm to keep
+# clone and checkout I/O in memory
+CACHE_DIR = os.environ.get("ARGUS_CACHE_DIR", tempfile.gettempdir())
+os.makedirs(CACHE_DIR, exist_ok=True)
+
+# Cached clones keyed by repo hash, least recently used first. Evicted
+# clones are deleted from disk so the cache cannot grow without bound.
+MAX_CACHED_REPOS = int(os.environ.get("ARGUS_MAX_CACHED_REPOS", "64"))
+MAX_CACHED_REPOS_BYTES = int(os.environ.get("ARGUS_MAX_CACHED_REPOS_BYTES", str(20 * 1024 ** 3)))
+REPO_CACHE: "OrderedDict[str, Repo]" = OrderedDict()
+REPO_CACHE_SIZES: Dict[str, int] = {}
+# Number of tool calls currently working with each cached clone
+REPO_USERS: "Counter[str]" = Counter()
+
+# One lock per cache slot so concurrent calls cannot clone into the same directory;
+# reentrant so a caller can hold its slot across clone_repo
+CLONE_LOCKS: Dict[str, threading.RLock] = {}
+CLONE_LOCKS_GUARD = threading.Lock()
+REPO_CACHE_LOCK = threading.RLock()
+
+# Caps clones and fetches in flight across all calls so a burst of requests
+# cannot flood the git server or the disk
+NETWORK_SLOTS = threading.BoundedSemaphore(max(2, (os.cpu_count() or 4) * 3 // 4))
+
+def get_clone_lock(repo_hash: str) -> threading.RLock:
+    """Return the lock guarding a single clone cache slot."""
+    with CLONE_LOCKS_GUARD:
+        return CLONE_LOCKS.setdefault(repo_hash, threading.RLock())
+
+# Cached Repo handles are shared between calls, and two threads reading objects
+# through a handle's single cat-file pipe at once get each other's responses
+OBJECT_LOCKS: Dict[str, threading.RLock] = {}
+
+def get_object_lock(repo: Repo) -> threading.RLock:
+    """Return the lock serializing object reads through a clone's Repo handle."""
+    with CLONE_LOCKS_GUARD:
+        return OBJECT_LOCKS.setdefault(repo.git_dir, threading.RLock())
+
+TRASH_MARKER = ".trash-"
+
+def discard_directory(path: str) -> None:
+    """Move a directory aside at once and delete it in the background."""
+    trash_path = f"{path}{TRASH_MARKER}{uuid.uuid4().hex}"
+    try:
+        # A rename within the cache directory is atomic, so the path is free immediately
+        os.rename(path, trash_path)
+    except FileNotFoundError:
+        return
+    except OSError:
+        shutil.rmtree(path, ignore_errors=True)
+        return
+    IO_POOL.submit(shutil.rmtree, trash_path, ignore_errors=True)
+
+# Private checkouts handed to scanners are created in a directory of this
+# process's own under CACHE_DIR, which other processes may share
+WORKTREE_PREFIX = "argus_worktree_"
+
+def open_worktree_root() -> tuple:
+    """Create this process's worktree directory, locked for as long as the process runs."""
+    name = f"{WORKTREE_PREFIX}{uuid.uuid4().hex}"
+    # The lock is taken before the directory exists, so no sweep can see it unlocked
+    lock_file = open(os.path.join(CACHE_DIR, f"{name}.lock"), "w")
+    fcntl.flock(lock_file, fcntl.LOCK_EX)
+    path = os.path.join(CACHE_DIR, name)
+    os.makedirs(path)
+    return path, lock_file
+
+def reap_worktree_root(path: str) -> None:
+    """Delete another process's worktree directory if that process has exited."""
+    try:
+        lock_file = open(f"{path}.lock", "a")
+    except OSError:
+        return
+    with lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            # Its owner still runs and may be reading these checkouts
+            return
+        shutil.rmtree(path, ignore_errors=True)
+        with contextlib.suppress(OSError):
+            os.unlink(f"{path}.lock")
+
+def sweep_discarded_directories() -> None:
+    """Delete discarded clones, and worktrees whose process has exited."""
+    for name in os.listdir(CACHE_DIR):
+        path = os.path.join(CACHE_DIR, name)
+        if name.startswith("repo_cache_") and TRASH_MARKER in name:
+            IO_POOL.submit(shutil.rmtree, path, ignore_errors=True)
+        # The clones' records of reaped worktrees are pruned on their next add_worktree
+        elif name.startswith(WORKTREE_PREFIX) and path != WORKTREE_ROOT and os.path.isdir(path):
+            IO_POOL.submit(reap_worktree_root, path)
+
+WORKTREE_ROOT, WORKTREE_ROOT_LOCK = open_worktree_root()
+sweep_discarded_directories()
+
+def get_directory_size(path: str) -> int:
+    """Return the total size in bytes of all files beneath a directory."""
+    total = 0
+    pending = [path]
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except OSError:
+            continue
+        # scandir already knows each entry's type, so only files are stat'ed
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    else:
+                        total += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
+    return total
+
+def evict_cached_repo(repo_hash: str) -> None:
+    """Drop a clone from the cache and delete its working tree."""
+    with REPO_CACHE_LOCK:
+        repo = REPO_CACHE.pop(repo_hash, None)
+        REPO_CACHE_SIZES.pop(repo_hash, None)
+    if repo is not None:
+        repo.close()
+        discard_directory(repo.working_tree_dir)
+
+def has_live_worktrees(repo: Repo) -> bool:
+    """Check whether any worktree added from a clone still exists on disk."""
+    records = os.path.join(repo.git_dir, "worktrees")
+    try:
+        names = os.listdir(records)
+    except OSError:
+        return False
+    for name in names:
+        try:
+            with open(os.path.join(records, name, "gitdir")) as f:
+                gitdir = f.read().strip()
+        except OSError:
+            continue
+        if os.path.exists(gitdir):
+            return True
+    return False
+
+def evict_idle_repo(keep_hash: str) -> bool:
+    """Evict the least recently used clone nobody is using; False if every other clone is busy."""
+    with REPO_CACHE_LOCK:
+        for repo_hash, repo in list(REPO_CACHE.items()):
+            if repo_hash == keep_hash or REPO_USERS[repo_hash]:
+                continue
+            # A slot whose lock is taken is being cloned or fetched right now; waiting
+            # for it here could deadlock against a call that is waiting for this one
+            lock = get_clone_lock(repo_hash)
+            if not lock.acquire(blocking=False):
+                continue
+            try:
+                if has_live_worktrees(repo):
+                    continue
+                evict_cached_repo(repo_hash)
+                return True
+            finally:
+                lock.release()
+    return False
+
+def cache_repo(repo_hash: str, repo: Repo) -> None:
+    """Record a clone as most recently used and evict idle old clones over budget."""
+    size = get_directory_size(repo.working_tree_dir)
+    with REPO_CACHE_LOCK:
+        REPO_CACHE[repo_hash] = repo
+        REPO_CACHE.move_to_end(repo_hash)
+        REPO_CACHE_SIZES[repo_hash] = size
+        # Clones in use stay even over budget; they are evicted by a later call once idle
+        while len(REPO_CACHE) > 1 and (
+            len(REPO_CACHE) > MAX_CACHED_REPOS or sum(REPO_CACHE_SIZES.values()) > MAX_CACHED_REPOS_BYTES
+        ):
+            if not evict_idle_repo(repo_hash):
+                break
+
+def refresh_cached_size(repo: Repo) -> None:
+    """Re-measure a cached clone after a fetch so the byte budget follows its disk usage."""
+    size = get_directory_size(repo.working_tree_dir)
+    repo_hash = get_repo_hash(repo)
+    with REPO_CACHE_LOCK:
+        if REPO_CACHE.get(repo_hash) is repo:
+            REPO_CACHE_SIZES[repo_hash] = size
+
+# Optional directory of bare mirrors that new clones borrow objects from.
+# Mirrors cost a full fetch up front, so they are only kept when
+# this is set, which suits hosts that poll the same repositories repeatedly.
+# They hold every object: a clone referencing a mirror never asks the server
+# for objects reachable from the mirror's commits.
+MIRROR_DIR = os.environ.get("ARGUS_MIRROR_DIR")
+
+def update_mirror(repo_url: str, authenticated_url: str) -> Optional[str]:
+    """Create or refresh the bare mirror of a repository and return its path."""
+    if not MIRROR_DIR:
+        return None
+
+    mirror_hash = hashlib.blake2b(repo_url.encode(), digest_size=6).hexdigest()
+    mirror_path = os.path.join(MIRROR_DIR, f"{mirror_hash}.git")
+    with get_clone_lock(f"mirror:{mirror_hash}"):
+        try:
+            if not os.path.isdir(mirror_path):
+                os.makedirs(MIRROR_DIR, exist_ok=True)
+                mirror = Repo.init(mirror_path, bare=True)
+                # Keep credentials out of the stored remote; they are passed per fetch
+                mirror.create_remote("origin", repo_url)
+            else:
+                mirror = Repo(mirror_path)
+            with NETWORK_SLOTS:
+                mirror.git.fetch(
+                    authenticated_url, "+refs/heads/*:refs/heads/*", "+refs/tags/*:refs/tags/*",
+                    "--prune", env=get_parallel_config_env()
+                )
+            return mirror_path
+        except GitCommandError:
+            shutil.rmtree(mirror_path, ignore_errors=True)
+            return None
+
+def get_url_fingerprint(url: str) -> str:
+    """Hash a clone URL so it can be compared without storing credentials."""
+    return hashlib.blake2b(url.encode(), digest_size=16).hexdigest()
+
+def get_clone_marker_path(repo_dir: str) -> str:
+    """Path of the file recording which URL a cached clone came from."""
+    return os.path.join(repo_dir, ".git", "argus-clone-url")
+
+def read_clone_marker(repo_dir: str) -> Optional[str]:
+    """Read a cached clone's URL fingerprint, or None if it has none."""
+    try:
+        with open(get_clone_marker_path(repo_dir)) as f:
+            return f.read()
+    except OSError:
+        return None
+
+def write_clone_marker(repo_dir: str, url: str) -> None:
+    """Record the URL fingerprint of a fresh clone."""
+    with open(get_clone_marker_path(repo_dir), "w") as f:
+        f.write(get_url_fingerprint(url))
+
+def is_shallow_repo(repo: Repo) -> bool:
+    """Check whether a clone has truncated history."""
+    return os.path.exists(os.path.join(repo.git_dir, "shallow"))
+
+# Full object ids can be fetched by id; abbreviated ones only resolve against the whole history
+FULL_OBJECT_ID = re.compile(r"[0-9a-f]{40}|[0-9a-f]{64}")
+ABBREVIATED_OBJECT_ID = re.compile(r"[0-9a-f]{7,63}")
+
+# Remote refs a name can stand for, in the order git itself tries them
+REMOTE_REF_PATTERNS = ("refs/{}", "refs/tags/{}", "refs/heads/{}", "refs/remotes/origin/{}")
+
+def resolve_remote_ref(repo: Repo, rev: str) -> Optional[tuple]:
+    """Find the remote ref a name stands for as (object id, ref), or None if the remote has none."""
+    candidates = [pattern.format(rev) for pattern in REMOTE_REF_PATTERNS]
+    listed = {}
+    for line in repo.git.ls_remote("origin", *candidates).splitlines():
+        object_id, ref = line.split("\t", 1)
+        listed[ref] = object_id
+    # ls-remote also matches on trailing components, so only exact names count
+    matches = [ref for ref in candidates if ref in listed]
+    # Annotated tags are compared by the commit they point to
+    if len({listed.get(f"{ref}^{{}}", listed[ref]) for ref in matches}) > 1:
+        raise ValueError(f"Revision {rev} is ambiguous on the remote: {', '.join(matches)}")
+    return (listed[matches[0]], matches[0]) if matches else None
+
+def fetch_revision(repo: Repo, rev: str) -> str:
+    """Fetch a revision missing from a shallow clone and return a name that resolves to it locally."""
+    if not is_shallow_repo(repo):
+        return rev
+    # Fetches change the shared clone, so they take its slot like clone_repo does
+    with get_clone_lock(get_repo_hash(repo)):
+        try:
+            # rev-parse runs as its own process, so no object lock is needed
+            repo.git.rev_parse("--verify", "--quiet", f"{rev}^{{commit}}")
+            return rev
+        except GitCommandError:
+            pass
+
+        with NETWORK_SLOTS:
+            # The server rejects ids it does not have, so a typo costs one small request
+            match = (rev, rev) if FULL_OBJECT_ID.fullmatch(rev) else resolve_remote_ref(repo, rev)
+            if match:
+                resolved, ref = match
+                repo.git.fetch("origin", ref, depth=2)
+            elif "~" in rev or "^" in rev or ABBREVIATED_OBJECT_ID.fullmatch(rev):
+                # Ancestors and abbreviated ids can only be found in the full history
+                repo.remote().fetch(unshallow=True)
+                resolved = rev
+            else:
+                raise ValueError(f"Unknown revision: {rev}")
+        if not is_shallow_repo(repo):
+            write_commit_graph(repo)
+        refresh_cached_size(repo)
+    return resolved
+
+# Cached clones fetched within this many seconds are used as they are, so
+# bursts of tool calls against one repository share a single fetch
+FETCH_TTL_SECONDS = float(os.environ.get("ARGUS_FETCH_TTL_SECONDS", "60"))
+
+def get_fetch_marker_path(repo: Repo) -> str:
+    """Path of the file whose mtime records a clone's last fetch."""
+    return os.path.join(repo.git_dir, "argus-last-fetch")
+
+def fetched_recently(repo: Repo) -> bool:
+    """Check whether a clone was fetched within the fetch TTL."""
+    try:
+        return time.time() - os.path.getmtime(get_fetch_marker_path(repo)) < FETCH_TTL_SECONDS
+    except OSError:
+        return False
+
+def tracks_all_branches(repo: Repo) -> bool:
+    """Check whether a clone's origin fetches every remote branch."""
+    try:
+        refspecs = repo.config_reader("repository").get_values('remote "origin"', "fetch")
+    except (configparser.NoSectionError, configparser.NoOptionError):
+        return False
+    return "+refs/heads/*:refs/remotes/origin/*" in refspecs
+
+def migrate_legacy_clone(cache_key: str, repo_dir: str, authenticated_url: str) -> None:
+    """Move a clone cached under the old SHA-256 directory name to its current name."""
+    legacy_hash = hashlib.sha256(cache_key.encode()).hexdigest()[:12]
+    legacy_dir = os.path.join(CACHE_DIR, f"repo_cache_{legacy_hash}")
+    if os.path.exists(repo_dir) or not os.path.isdir(legacy_dir):
+        return
+    try:
+        # Old clones carry no URL marker, so check the remote once and record it
+        with Repo(legacy_dir) as legacy_repo:
+            if legacy_repo.bare or legacy_repo.remote().url != authenticated_url:
+                return
+        os.rename(legacy_dir, repo_dir)
+        write_clone_marker(repo_dir, authenticated_url)
+    except (InvalidGitRepositoryError, NoSuchPathError, ValueError, OSError):
+        return
+
+def fetch_repo_updates(repo: Repo, depth: Optional[int] = 1, single_branch: bool = True) -> None:
+    """Fetch updates for a cached clone, widening or deepening it when required."""
+    widen = not single_branch and not tracks_all_branches(repo)
+    if widen:
+        repo.git.remote("set-branches", "origin", "*")
+
+    fetch_kwargs = {}
+    if is_shallow_repo(repo):
+        if depth is None:
+            fetch_kwargs["unshallow"] = True
+        elif depth > 1 and int(repo.git.rev_list("--count", "HEAD")) < depth:
+            # Only ever deepen: fetching with a smaller depth truncates history
+            fetch_kwargs["depth"] = depth
+
+    if not widen and not fetch_kwargs and fetched_recently(repo):
+        return
+    with NETWORK_SLOTS:
+        repo.remote().fetch(prune=True, **fetch_kwargs)
+    Path(get_fetch_marker_path(repo)).touch()
+    if "unshallow" in fetch_kwargs:
+        write_commit_graph(repo)
+
+    # Move the checkout to the fetched tip so cached clones never serve stale files
+    if not repo.head.is_detached and repo.active_branch.tracking_branch() is not None:
+        repo.git.reset("--hard", "@{upstream}")
+    refresh_cached_size(repo)
+
+def clone_is_intact(repo: Repo) -> bool:
+    """Check whether a clone's HEAD still resolves to a commit."""
+    try:
+        repo.git.rev_parse("--verify", "--quiet", "HEAD^{commit}")
+        return True
+    except GitCommandError:
+        return False
+
+def update_cached_clone(repo: Repo, depth: Optional[int], single_branch: bool, branch: Optional[str]) -> None:
+    """Fetch a cached clone and check out its branch, keeping the last fetched state if that fails."""
+    try:
+        fetch_repo_updates(repo, depth, single_branch)
+        if branch:
+            repo.git.checkout(branch)
+    except (GitCommandError, KeyError) as e:
+        # A passing network error must not cost a good clone; only a broken one is rebuilt
+        if not clone_is_intact(repo):
+            raise
+        logger.warning("Could not update cached clone %s, using it as last fetched: %s", repo.working_tree_dir, e)
+
+@functools.lru_cache(maxsize=1024)
+def get_clone_location(
+    repo_url: str,
+    gitlab_credentials: Optional[GitLabCredentials],
+    branch: Optional[str]
+) -> tuple:
+    """Derive the cache key, repo hash and cache directory of a clone."""
     # Generate cache directory name based on URL, credentials and branch
     cache_key = f"{repo_url}:{gitlab_credentials.api_key if gitlab_credentials else ''}:{branch or 'default'}"
-    repo_hash = hashlib.sha256(cache_key.encode()).hexdigest()[:12]
-    temp_dir = os.path.join(tempfile.gettempdir(), f"repo_cache_{repo_hash}")
+    repo_hash = hashlib.blake2b(cache_key.encode(), digest_size=6).hexdigest()
+    return cache_key, repo_hash, os.path.join(CACHE_DIR, f"repo_cache_{repo_hash}")
+
+def get_repo_hash(repo: Repo) -> str:
+    """Return the cache slot of a cached clone from its directory name."""
+    return os.path.basename(repo.working_tree_dir).removeprefix("repo_cache_")
+
+def clone_repo(
+    repo_url: str,
+    gitlab_credentials: Optional[GitLabCredentials] = None,
+    branch: Optional[str] = None,
+    depth: Optional[int] = 1,
+    single_branch: bool = True
+) -> Repo:
+    """
+    Clone or retrieve an existing repository from cache and return its handle.
+
+    The handle is kept with the cache, so repeated calls reuse the parsed
+    repository state instead of constructing a new `Repo`.
+
+    Clones are shallow and single-branch by default. Pass `depth=None` for full
+    history and `single_branch=False` when all remote branches are needed.
+    """
+    cache_key, repo_hash, temp_dir = get_clone_location(repo_url, gitlab_credentials, branch)
     
-    authenticated_url = get_authenticated_url(repo_url, gitlab_credentials)
+    # Concurrent calls for the same clone wait here instead of racing the clone
+    with get_clone_lock(repo_hash):
+        authenticated_url = get_authenticated_url(repo_url, gitlab_credentials)
     
-    # If directory exists and is a valid git repo, fetch updates
-    if os.path.exists(temp_dir):
+        # Clones already validated by this process only need a fetch
+        repo = REPO_CACHE.get(repo_hash)
+        if repo is not None and os.path.isdir(repo.git_dir):
+            try:
+                update_cached_clone(repo, depth, single_branch, branch)
+                with REPO_CACHE_LOCK:
+                    REPO_CACHE.move_to_end(repo_hash)
+                return repo
+            except (GitCommandError, KeyError):
+                # A broken clone that other calls still read from is left to them
+                with REPO_CACHE_LOCK:
+                    in_use = REPO_USERS[repo_hash] > 0
+                if in_use or has_live_worktrees(repo):
+                    raise
+                evict_cached_repo(repo_hash)
+        with REPO_CACHE_LOCK:
+            REPO_CACHE.pop(repo_hash, None)
+            REPO_CACHE_SIZES.pop(repo_hash, None)
+
+        migrate_legacy_clone(cache_key, temp_dir, authenticated_url)
+
+        # If directory exists and was cloned from the same URL, fetch updates
+        if os.path.exists(temp_dir):
+            try:
+                if read_clone_marker(temp_dir) == get_url_fingerprint(authenticated_url):
+                    repo = Repo(temp_dir)
+                    apply_clone_config(repo)
+                    update_cached_clone(repo, depth, single_branch, branch)
+                    cache_repo(repo_hash, repo)
+                    return repo
+                # If URLs don't match, clean up and re-clone
+                discard_directory(temp_dir)
+            except (InvalidGitRepositoryError, NoSuchPathError, GitCommandError, OSError) as e:
+                # A broken cached clone is replaced; interrupts still propagate
+                logger.debug("Discarding unusable cached clone %s: %s", temp_dir, e)
+                discard_directory(temp_dir)
+    
+        # Create directory and clone repository
+        os.makedirs(temp_dir, exist_ok=True)
         try:
-            repo = Repo(temp_dir)
-            if not repo.bare and repo.remote().url == authenticated_url:
-                repo.remote().fetch()
+            options = get_clone_options(depth, single_branch)
+            mirror_path = update_mirror(repo_url, authenticated_url)
+            if mirror_path:
+                # Borrow objects already in the mirror, then copy them so the
+                # clone does not depend on the mirror afterwards
+                options += ["--reference-if-able", mirror_path, "--dissociate"]
+            env = get_parallel_config_env()
+            with NETWORK_SLOTS:
                 if branch:
-                    repo.git.checkout(branch)
-                return temp_dir
-            # If URLs don't match, clean up and re-clone
-            shutil.rmtree(temp_dir, ignore_errors=True)
-        except:
-            shutil.rmtree(temp_dir, ignore_errors=True)
-    
-    # Create directory and clone repository
-    os.makedirs(temp_dir, exist_ok=True)
+                    repo = Repo.clone_from(authenticated_url, temp_dir, branch=branch, multi_options=options, env=env)
+                else:
+                    repo = Repo.clone_from(authenticated_url, temp_dir, multi_options=options, env=env)
+            apply_clone_config(repo)
+            if depth is None:
+                write_commit_graph(repo)
+            write_clone_marker(temp_dir, authenticated_url)
+            Path(get_fetch_marker_path(repo)).touch()
+            cache_repo(repo_hash, repo)
+            return repo
+        except Exception as e:
+            discard_directory(temp_dir)
+            raise Exception(f"Repository cloning failed: {str(e)}")
+
+def hold_cached_repo(
+    repo_url: str,
+    gitlab_credentials: Optional[GitLabCredentials] = None,
+    branch: Optional[str] = None,
+    **kwargs: Any
+) -> tuple:
+    """Clone or reuse a repository and mark it in use; returns its repo hash and handle."""
+    _, repo_hash, _ = get_clone_location(repo_url, gitlab_credentials, branch)
+    # Holding the slot across both steps leaves no gap in which it could be evicted
+    with get_clone_lock(repo_hash):
+        repo = clone_repo(repo_url, gitlab_credentials, branch, **kwargs)
+        with REPO_CACHE_LOCK:
+            REPO_USERS[repo_hash] += 1
+    return repo_hash, repo
+
+def release_cached_repo(repo_hash: str) -> None:
+    """Mark one use of a cached clone as finished."""
+    with REPO_CACHE_LOCK:
+        REPO_USERS[repo_hash] -= 1
+        if REPO_USERS[repo_hash] <= 0:
+            del REPO_USERS[repo_hash]
+
+@contextlib.asynccontextmanager
+async def cached_repo(
+    repo_url: str,
+    gitlab_credentials: Optional[GitLabCredentials] = None,
+    branch: Optional[str] = None,
+    **kwargs: Any
+) -> Any:
+    """Provide a cached clone that cannot be evicted for the duration of a block."""
+    repo_hash, repo = await run_blocking(hold_cached_repo, repo_url, gitlab_credentials, branch, **kwargs)
     try:
-        if branch:
-            Repo.clone_from(authenticated_url, temp_dir, branch=branch)
-        else:
-            Repo.clone_from(authenticated_url, temp_dir)
-        return temp_dir
-    except Exception as e:
-        shutil.rmtree(temp_dir, ignore_errors=True)
-        raise Exception(f"Repository cloning failed: {str(e)}")
-
-def get_directory_tree(path: str, prefix: str = "") -> str:
-    """Generate a tree-like directory structure string"""
-    output = ""
-    entries = os.listdir(path)
-    entries.sort()
-    
-    for i, entry in enumerate(entries):
-        if entry.startswith('.git'):
+        yield repo
+    finally:
+        release_cached_repo(repo_hash)
+
+# Entries left out of directory trees: git metadata plus dependency and
+# cache directories that can hold huge numbers of irrelevant files
+TREE_SKIP_NAMES = frozenset({
+    '.git', '.github', '.gitlab', 'node_modules', 'vendor', 'target', 'dist',
+    '__pycache__', '.venv', '.tox', '.mypy_cache', '.pytest_cache',
+})
+
+# Bounds on rendered trees; past a few thousand lines a tree stops being
+# readable and only costs time and memory
+DEFAULT_TREE_MAX_ENTRIES = 5000
+DEFAULT_TREE_MAX_DEPTH = 8
+
+def list_tracked_paths(repo_path: str, rev: str = "HEAD") -> Dict[str, Any]:
+    """Nest the paths tracked at a revision into dicts; files map to None."""
+    root = {}
+    output = Git(repo_path).ls_tree("-r", "-z", "--name-only", rev)
+    for path in output.split("\0"):
+        if not path:
             continue
-            
-        is_last = i == len(entries) - 1
+        *dirs, name = path.split("/")
+        node = root
+        for directory in dirs:
+            node = node.setdefault(directory, {})
+        node[name] = None
+    return root
+
+def get_directory_tree(
+    path: str,
+    prefix: str = "",
+    skip: frozenset = TREE_SKIP_NAMES,
+    rev: str = "HEAD",
+    max_entries: int = DEFAULT_TREE_MAX_ENTRIES,
+    max_depth: int = DEFAULT_TREE_MAX_DEPTH
+) -> str:
+    """Generate a tree-like directory structure string, truncated past `max_entries` lines or `max_depth` levels"""
+    # git already knows the tracked paths, so read them from the commit's
+    # tree instead of walking the working tree
+    tracked = list_tracked_paths(path, rev)
+
+    def children(node: Dict[str, Any]) -> deque:
+        return deque(sorted(((name, child) for name, child in node.items() if name not in skip), key=lambda item: item[0]))
+
+    parts = []
+    # Depth-first walk over an explicit stack of (remaining entries, prefix, depth) triples
+    stack = deque([(children(tracked), prefix, 1)])
+    while stack:
+        entries, entry_prefix, depth = stack[-1]
+        if not entries:
+            stack.pop()
+            continue
+        if len(parts) >= max_entries:
+            parts.append("… (truncated)\n")
+            break
+
+        name, child = entries.popleft()
+        is_last = not entries
         current_prefix = "└── " if is_last else "├── "
         next_prefix = "    " if is_last else "│   "
-        
-        entry_path = os.path.join(path, entry)
-        output += prefix + current_prefix + entry + "\n"
-        
-        if os.path.isdir(entry_path):
-            output += get_directory_tree(entry_path, prefix + next_prefix)
-            
-    return output
+        parts.append(entry_prefix + current_prefix + name + "\n")
+
+        if child is not None and depth < max_depth:
+            stack.append((children(child), entry_prefix + next_prefix, depth + 1))
+
+    return "".join(parts)
+
+@functools.lru_cache(maxsize=128)
+def get_repository_tree(
+    repo_path: str,
+    head_sha: str,
+    max_entries: int = DEFAULT_TREE_MAX_ENTRIES,
+    max_depth: int = DEFAULT_TREE_MAX_DEPTH
+) -> str:
+    """Render the tree of a clone's commit, memoized by the commit id and bounds."""
+    # Also kept on disk next to the clone so it survives process restarts
+    cache_path = os.path.join(repo_path, ".git", f"argus-tree-{head_sha}-{max_entries}-{max_depth}")
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        pass
+
+    tree = get_directory_tree(repo_path, rev=head_sha, max_entries=max_entries, max_depth=max_depth)
+    for stale_path in Path(repo_path, ".git").glob("argus-tree-*"):
+        if not stale_path.name.startswith(f"argus-tree-{head_sha}-"):
+            stale_path.unlink(missing_ok=True)
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=os.path.dirname(cache_path), delete=False) as f:
+        f.write(tree)
+    os.replace(f.name, cache_path)
+    return tree
 
 def create_gitlab_credentials(creds: Optional[Union[str, dict]]) -> Optional[GitLabCredentials]:
     """Convert various credential formats to GitLabCredentials."""
@@ -331,33 +1010,125 @@ def create_gitlab_credentials(creds: Optional[Union[str, dict]]) -> Optional[Git
     if isinstance(creds, str):
         return GitLabCredentials(api_key=creds)
     if isinstance(creds, dict):
-        return GitLabCredentials(**creds)
+        return GitLabCredentials(api_key=creds["api_key"])
     return None
 
-def get_diff_changes(repo_path: str, source: Optional[str], target: Optional[str], file_path: Optional[str] = None) -> str:
-    """Get diff between two commits/branches."""
-    try:
-        repo = Repo(repo_path)
-        # Handle source
-        if source:
-            source_commit = repo.commit(source)
-        else:
-            source_commit = repo.head.commit
-
-        # Handle target
-        if target:
-            target_commit = repo.commit(target)
-        else:
-            target_commit = source_commit.parents[0] if source_commit.parents else None
-            if not target_commit:
-                return "No previous commit found to compare with."
-
-        # Generate diff
-        if file_path:
-            diff = repo.git.diff(target_commit, source_commit, '--', file_path)
-        else:
-            diff = repo.git.diff(target_commit, source_commit)
+def read_git_object(entry: Any) -> bytes:
+    """Read a tree entry through the repository's persistent `git cat-file --batch` process."""
+    if entry.type == "submodule":
+        return f"Subproject commit {entry.hexsha}\n".encode()
+    return entry.data_stream.read()
+
+def get_tree_entry(tree: Any, path: str) -> Any:
+    """Look up a path inside a git tree, returning None when it does not exist."""
+    try:
+        return tree / path
+    except KeyError:
+        return None
+
+def diff_tree_entries(old: Any, new: Any, path: str = "") -> Any:
+    """Yield (path, old_entry, new_entry) for every non-tree entry that differs beneath two tree entries."""
+    if old is None and new is None:
+        return
+    # Identical ids mean identical content, so whole unchanged subtrees are skipped
+    if old is not None and new is not None and old.binsha == new.binsha and old.mode == new.mode:
+        return
+
+    old_is_tree = old is not None and old.type == "tree"
+    new_is_tree = new is not None and new.type == "tree"
+    if not old_is_tree and not new_is_tree:
+        yield path, old, new
+        return
+    if old is not None and not old_is_tree:
+        yield path, old, None
+    if new is not None and not new_is_tree:
+        yield path, None, new
+
+    old_children = {entry.name: entry for entry in old} if old_is_tree else {}
+    new_children = {entry.name: entry for entry in new} if new_is_tree else {}
+
+    def sort_key(name: str) -> str:
+        # git orders tree entries as if directory names carried a trailing slash
+        entry = old_children.get(name) or new_children.get(name)
+        return name + "/" if entry.type == "tree" else name
+
+    for name in sorted(old_children.keys() | new_children.keys(), key=sort_key):
+        child_path = f"{path}/{name}" if path else name
+        yield from diff_tree_entries(old_children.get(name), new_children.get(name), child_path)
+
+# Rendered diffs keyed by repository and resolved commit ids, least recently
+# used first; diffs between two fixed commits never change
+MAX_CACHED_DIFFS = 512
+DIFF_CACHE: "OrderedDict[tuple, str]" = OrderedDict()
+DIFF_CACHE_LOCK = threading.Lock()
+
+def get_cached_diff(key: tuple) -> Optional[str]:
+    """Return a previously rendered diff, marking it as most recently used."""
+    with DIFF_CACHE_LOCK:
+        diff = DIFF_CACHE.get(key)
+        if diff is not None:
+            DIFF_CACHE.move_to_end(key)
+        return diff
+
+def cache_diff(key: tuple, diff: str) -> None:
+    """Remember a rendered diff, dropping the oldest ones over the limit."""
+    with DIFF_CACHE_LOCK:
+        DIFF_CACHE[key] = diff
+        DIFF_CACHE.move_to_end(key)
+        while len(DIFF_CACHE) > MAX_CACHED_DIFFS:
+            DIFF_CACHE.popitem(last=False)
+
+def get_diff_changes(repo: Repo, source: Optional[str], target: Optional[str], file_path: Optional[str] = None, name_only: bool = False, context_lines: int = 3) -> str:
+    """Get diff between two commits/branches, or just the changed paths when `name_only` is set."""
+    try:
+        # Missing history is fetched before taking the object lock, so other
+        # readers of this clone never wait on the network
+        source = source and fetch_revision(repo, source)
+        target = target and fetch_revision(repo, target)
+    except GitCommandError as e:
+        return f"Git diff failed: {str(e)}"
+    except ValueError as e:
+        return f"Error generating diff: {str(e)}"
+
+    try:
+        with get_object_lock(repo):
+            # Handle source
+            if source:
+                source_commit = repo.commit(source)
+            else:
+                source_commit = repo.head.commit
+
+            # Handle target
+            if target:
+                target_commit = repo.commit(target)
+            else:
+                target_commit = source_commit.parents[0] if source_commit.parents else None
+                if not target_commit:
+                    return "No previous commit found to compare with."
+
+            # Keyed on commit ids rather than the requested names, which can move
+            cache_key = (repo.git_dir, target_commit.hexsha, source_commit.hexsha, file_path, name_only, context_lines)
+            diff = get_cached_diff(cache_key)
+            if diff is not None:
+                return diff if diff else "No changes found."
 
+            # Changed paths fall out of a tree walk over the persistent cat-file pipe
+            # without reading any blobs; pathspec globs and magic need git to resolve them
+            if name_only and not (file_path and any(char in file_path for char in "*?[:")):
+                path = file_path.strip("/") if file_path else ""
+                old_entry = get_tree_entry(target_commit.tree, path) if path else target_commit.tree
+                new_entry = get_tree_entry(source_commit.tree, path) if path else source_commit.tree
+                changes = diff_tree_entries(old_entry, new_entry, path)
+                diff = "\n".join(dict.fromkeys(changed_path for changed_path, _, _ in changes))
+
+        if diff is None:
+            # Patches come from git itself so they match `git diff` byte for byte; it runs
+            # as its own process, so the object lock is not held meanwhile.
+            # Rename detection pairs up similar files, which the output never reports
+            options = ["--no-renames", "--no-color", "--no-ext-diff", "--name-only" if name_only else f"--unified={context_lines}"]
+            diff = repo.git.diff(target_commit.hexsha, source_commit.hexsha, *options, '--', *([file_path] if file_path else []))
+
+        cache_diff(cache_key, diff)
         return diff if diff else "No changes found."
 
     except GitCommandError as e:
@@ -365,32 +1136,174 @@ def get_diff_changes(repo_path: str, source: Optional[str], target: Optional[str
     except Exception as e:
         return f"Error generating diff: {str(e)}"
 
+# Longest each analyzer may run before its whole process tree is stopped
+TOOL_TIMEOUT_SECONDS = {
+    "trivy": 600,
+    "pmd": 900,
+    "gocyclo": 300,
+    "pylint": 600,
+    "bandit": 300,
+    "eslint": 600,
+}
+DEFAULT_TOOL_TIMEOUT_SECONDS = 600
+# Time a stopped analyzer gets to exit on SIGTERM before it is killed
+TOOL_STOP_GRACE_SECONDS = 2
+
+def stop_process_group(process: subprocess.Popen) -> None:
+    """Terminate a process and its children, killing them if they do not exit in time."""
+    with contextlib.suppress(ProcessLookupError):
+        os.killpg(process.pid, signal.SIGTERM)
+    try:
+        process.wait(timeout=TOOL_STOP_GRACE_SECONDS)
+    except subprocess.TimeoutExpired:
+        with contextlib.suppress(ProcessLookupError):
+            os.killpg(process.pid, signal.SIGKILL)
+
+@contextlib.contextmanager
+def open_tool_process(command: List[str], **kwargs: Any):
+    """Start an analyzer in its own process group, raising TimeoutExpired if it had to be stopped."""
+    timeout = TOOL_TIMEOUT_SECONDS.get(command[0], DEFAULT_TOOL_TIMEOUT_SECONDS)
+    expired = threading.Event()
+
+    def expire() -> None:
+        expired.set()
+        stop_process_group(process)
+
+    # A session of its own lets the whole tree be signalled, including any workers the tool forks
+    process = subprocess.Popen(command, start_new_session=True, **kwargs)
+    timer = threading.Timer(timeout, expire)
+    timer.daemon = True
+    timer.start()
+    try:
+        # The deadline also covers the wait for exit once the caller is done reading
+        with process:
+            try:
+                yield process
+                process.wait()
+            except Exception:
+                # Reading a stopped tool's truncated output fails; report the timeout instead
+                if not expired.is_set():
+                    raise
+    finally:
+        timer.cancel()
+    if expired.is_set():
+        raise subprocess.TimeoutExpired(command, timeout)
+
+# Fields kept from each Trivy finding; the rest of the report is dropped while parsing
+TRIVY_VULNERABILITY_FIELDS = ("VulnerabilityID", "Severity", "PkgName", "InstalledVersion", "FixedVersion", "Title")
+TRIVY_SECRET_FIELDS = ("RuleID", "Category", "Severity", "Title", "StartLine", "EndLine")
+
+def slim_trivy_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce one Trivy scan target to the fields reported back to callers."""
+    slim = {key: result[key] for key in ("Target", "Class", "Type") if key in result}
+    for key, fields in (("Vulnerabilities", TRIVY_VULNERABILITY_FIELDS), ("Secrets", TRIVY_SECRET_FIELDS)):
+        if result.get(key):
+            slim[key] = [{field: finding[field] for field in fields if field in finding} for finding in result[key]]
+    return slim
+
+# Trivy's vulnerability DB is kept here across runs and refreshed at most
+# once per TTL; scans in between skip the update check entirely
+TRIVY_CACHE_DIR = os.environ.get("ARGUS_TRIVY_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "trivy"))
+TRIVY_DB_TTL_SECONDS = 24 * 60 * 60
+TRIVY_DB_LOCK = threading.Lock()
+
+# Optional `trivy server` URL; scans then use the server's already loaded DB
+# instead of opening it in every process
+TRIVY_SERVER = os.environ.get("ARGUS_TRIVY_SERVER")
+
+# Registry mirror to download Trivy's DB from instead of the public default
+TRIVY_DB_REPOSITORY = os.environ.get("ARGUS_TRIVY_DB_REPOSITORY")
+
+def get_trivy_db_marker_path() -> str:
+    """Path of the file whose mtime records the last successful DB update."""
+    return os.path.join(TRIVY_CACHE_DIR, "argus-db-updated")
+
+def trivy_db_is_fresh() -> bool:
+    """Check whether Trivy's DB was updated within the TTL."""
+    try:
+        return time.time() - os.path.getmtime(get_trivy_db_marker_path()) < TRIVY_DB_TTL_SECONDS
+    except OSError:
+        return False
+
 def run_trivy_scan(repo_path: str) -> Dict[str, Any]:
     """Run Trivy vulnerability scanner on repository."""
+    ensure_trivy()
+    if not TRIVY_SERVER and not trivy_db_is_fresh():
+        # Only one caller downloads the DB while the others wait for it; the
+        # scans themselves then all run outside the lock
+        with TRIVY_DB_LOCK:
+            if not trivy_db_is_fresh():
+                try:
+                    update_trivy_db()
+                except FileNotFoundError:
+                    return {"error": "Trivy not installed. Please install Trivy first."}
+                except Exception as e:
+                    return {"error": f"Trivy DB update failed: {str(e)}"}
+    return run_trivy_process(repo_path)
+
+def update_trivy_db() -> None:
+    """Download Trivy's vulnerability DB into the shared cache and mark it fresh."""
+    command = ["trivy", "image", "--quiet", "--cache-dir", TRIVY_CACHE_DIR, "--download-db-only"]
+    if TRIVY_DB_REPOSITORY:
+        command += ["--db-repository", TRIVY_DB_REPOSITORY]
+    with tempfile.TemporaryFile() as stderr:
+        with open_tool_process(command, stdout=subprocess.DEVNULL, stderr=stderr) as process:
+            returncode = process.wait()
+        if returncode != 0:
+            stderr.seek(0)
+            raise Exception(stderr.read().decode('utf-8', errors='replace'))
+    os.makedirs(TRIVY_CACHE_DIR, exist_ok=True)
+    Path(get_trivy_db_marker_path()).touch()
+
+def run_trivy_process(repo_path: str) -> Dict[str, Any]:
+    """Run `trivy fs` against the shared cache and parse its report."""
+    # Only vulnerabilities and secrets are reported, so the other scanners are
+    # pinned off whatever a Trivy version enables by default
+    command = [
+        "trivy", "fs", "--quiet", "--cache-dir", TRIVY_CACHE_DIR, "--format", "json",
+        "--scanners", "vuln,secret", "--skip-dirs", ".git",
+        # One-shot fs scans gain nothing from the on-disk scan cache, and it is
+        # locked by one process at a time; the DB still lives in --cache-dir
+        "--cache-backend", "memory"
+    ]
+    # The DB was refreshed by update_trivy_db if it was due, or is the server's
+    command.extend(["--server", TRIVY_SERVER] if TRIVY_SERVER else ["--skip-db-update"])
     try:
-        result = subprocess.run(
-            ["trivy", "fs", "--format", "json", repo_path],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        return json.loads(result.stdout)
-    except subprocess.CalledProcessError as e:
-        return {"error": f"Trivy scan failed: {e.stderr}"}
-    except json.JSONDecodeError:
-        return {"error": "Failed to parse Trivy output"}
+        with tempfile.TemporaryFile() as stderr, open_tool_process(
+            command + [repo_path],
+            stdout=subprocess.PIPE,
+            stderr=stderr
+        ) as process:
+            # Parse each scan target as Trivy writes it instead of buffering the whole report
+            try:
+                results = [slim_trivy_result(result) for result in ijson.items(process.stdout, "Results.item", use_float=True)]
+            except ijson.JSONError:
+                results = None
+            if process.wait() != 0:
+                stderr.seek(0)
+                return {"error": f"Trivy scan failed: {stderr.read().decode('utf-8', errors='replace')}"}
+        if results is None:
+            return {"error": "Failed to parse Trivy output"}
+        return {"Results": results}
     except FileNotFoundError:
         return {"error": "Trivy not installed. Please install Trivy first."}
+    except subprocess.TimeoutExpired as e:
+        return {"error": f"Trivy scan failed: {str(e)}"}
+
+# gocyclo lines read "<complexity> <package> <function> <file:row:column>"
+GOCYCLO_LINE = re.compile(rb'^(\d+)\s+\S+\s+(\S+)\s+(\S+)', re.M)
+GOCYCLO_AVERAGE = re.compile(rb'^Average:\s+([\d.]+)', re.M)
 
 def run_gocyclo_analysis(repo_path: str) -> Dict[str, Any]:
     """Run cyclomatic complexity analysis on Go code."""
     try:
-        result = subprocess.run(
+        with open_tool_process(
             ["gocyclo", "-avg", "-over=10", "."],
             cwd=repo_path,
-            capture_output=True,
-            text=True
-        )
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        ) as process:
+            output = process.stdout.read()
         
         metrics = {
             "cyclomatic_complexity": [],
@@ -398,68 +1311,154 @@ def run_gocyclo_analysis(repo_path: str) -> Dict[str, Any]:
             "high_complexity_functions": 0
         }
         
-        if result.stdout:
-            lines = result.stdout.strip().split('\n')
-            total_complexity = 0
-            for line in lines:
-                if line:
-                    parts = line.split()
-                    if len(parts) >= 4:
-                        complexity = int(parts[0])
-                        function_name = parts[-1]
-                        file_path = parts[-2]
-                        metrics["cyclomatic_complexity"].append({
-                            "complexity": complexity,
-                            "function": function_name,
-                            "file": file_path
-                        })
-                        total_complexity += complexity
-                        if complexity > 10:
-                            metrics["high_complexity_functions"] += 1
-                            
-            if len(lines) > 0:
-                metrics["average_complexity"] = total_complexity / len(lines)
-                
+        # One pass over the raw bytes; only the kept names are decoded
+        for complexity, function_name, file_path in GOCYCLO_LINE.findall(output):
+            metrics["cyclomatic_complexity"].append({
+                "complexity": int(complexity),
+                "function": function_name.decode('utf-8', errors='replace'),
+                "file": file_path.decode('utf-8', errors='replace')
+            })
+        complexities = [entry["complexity"] for entry in metrics["cyclomatic_complexity"]]
+        metrics["high_complexity_functions"] = sum(1 for complexity in complexities if complexity > 10)
+
+        # -avg reports the average over every function, not just those listed
+        average = GOCYCLO_AVERAGE.search(output)
+        if average:
+            metrics["average_complexity"] = float(average.group(1))
+        elif complexities:
+            metrics["average_complexity"] = sum(complexities) / len(complexities)
+
         return metrics
     except FileNotFoundError:
         return {"error": "gocyclo not installed. Please install with: go install github.com/fzipp/gocyclo/cmd/gocyclo@latest"}
     except Exception as e:
         return {"error": f"Failed to run gocyclo: {str(e)}"}
 
+def read_pmd_report(report: Any, repo_path: str) -> List[Dict[str, Any]]:
+    """Stream the violations out of a PMD XML report, with paths relative to the repository."""
+    violations = []
+    current_file = None
+    # PMD may report resolved paths, so both sides are compared with symlinks resolved
+    root = os.path.realpath(repo_path) + os.sep
+    for event, elem in ET.iterparse(report, events=("start", "end")):
+        # PMD reports are namespaced; only the local tag name matters
+        tag = elem.tag.rsplit("}", 1)[-1]
+        if event == "start":
+            if tag == "file":
+                current_file = os.path.realpath(elem.get("name", "")).removeprefix(root)
+            continue
+        if tag == "violation":
+            violations.append({
+                "file": current_file,
+                "begin_line": int(elem.get("beginline", 0)),
+                "end_line": int(elem.get("endline", 0)),
+                "rule": elem.get("rule"),
+                "ruleset": elem.get("ruleset"),
+                "priority": int(elem.get("priority", 0)),
+                "message": (elem.text or "").strip()
+            })
+        # Drop parsed elements so memory stays flat however large the report is
+        if tag in ("violation", "file", "error"):
+            elem.clear()
+    return violations
+
+# The Java ruleset only parses Java, though Kotlin and Scala files also count as java
+PMD_EXTENSIONS = frozenset({".java"})
+
 def run_pmd_analysis(repo_path: str) -> Dict[str, Any]:
-    """Run PMD static code analysis on Java code and return raw output."""
+    """Run PMD static code analysis on Java code and return its violations."""
+    ensure_pmd()
     try:
-        # Create temporary file for PMD output
-        with tempfile.NamedTemporaryFile(suffix='.xml', delete=False) as tmp_file:
-            output_path = tmp_file.name
-            
-        # Run PMD with output to file
-        result = subprocess.run(
-            [
-                "pmd",
-                "check",
-                "-d", repo_path,
-                "-R", "rulesets/java/quickstart.xml",
-                "-f", "xml",
-                "-r", output_path
-            ],
-            capture_output=True,
-            text=True
-        )
-        
-        try:
-            with open(output_path, 'r') as f:
-                xml_content = f.read()
-            return {"raw_output": xml_content}
-        finally:
-            os.unlink(output_path)
-                
+        # Hand PMD git's file inventory rather than letting it walk the whole checkout,
+        # and only one path per distinct content, so vendored copies are analyzed once
+        copies = {paths[0]: paths[1:] for paths in group_files_by_content(repo_path, PMD_EXTENSIONS).values()}
+        violations = []
+        # With no sources PMD prints no report at all, so it is not run
+        if copies:
+            with tempfile.NamedTemporaryFile("w", encoding="utf-8", suffix=".txt") as file_list:
+                file_list.write("\n".join(os.path.join(repo_path, path) for path in copies))
+                file_list.flush()
+                # PMD writes the report to stdout, where it is parsed as it is generated
+                with open_tool_process(
+                    [
+                        "pmd",
+                        "check",
+                        "--file-list", file_list.name,
+                        "-R", "rulesets/java/quickstart.xml",
+                        "-f", "xml",
+                        "--no-progress",
+                        # PMD analyzes files on its own worker threads
+                        "--threads", str(os.cpu_count() or 1)
+                    ],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL
+                ) as process:
+                    violations = read_pmd_report(process.stdout, repo_path)
+        # Identical files have identical findings, so each copy gets the analyzed file's
+        violations += [
+            {**violation, "file": copy}
+            for violation in violations
+            for copy in copies.get(violation["file"], ())
+        ]
+        return {
+            "violations": violations,
+            "total_violations": len(violations),
+            "by_priority": Counter(violation["priority"] for violation in violations),
+            "by_ruleset": Counter(violation["ruleset"] for violation in violations),
+            "by_file": Counter(violation["file"] for violation in violations)
+        }
     except FileNotFoundError:
         return {"error": "PMD not installed. Please install PMD from https://pmd.github.io/"}
     except Exception as e:
         return {"error": f"Failed to run PMD: {str(e)}"}
 
-def detect_repository_languages(repo_path: str) -> Dict[str, float]:
+def list_tracked_files(repo_path: str, rev: str = "HEAD") -> List[tuple]:
+    """List the regular files tracked at a revision as (path, size, blob id) triples."""
+    files = []
+    output = Git(repo_path).ls_tree("-r", "-l", "-z", rev)
+    for line in output.split("\0"):
+        if not line:
+            continue
+        info, path = line.split("\t", 1)
+        mode, object_type, blob, size = info.split()
+        # Symlinks and submodules are not source files
+        if object_type == "blob" and mode != "120000":
+            files.append((path, int(size), blob))
+    return files
+
+def probe_language_markers(candidate: tuple) -> Optional[str]:
+    """Return the candidate's language if the start of the file contains one of its markers."""
+    file_path, lang = candidate
+    # A raw read skips building a buffered text file object for 1KB of bytes
+    try:
+        fd = os.open(file_path, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        content = os.read(fd, 1024)  # Read first 1KB
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+    # Same heuristic as git: a NUL byte marks the content as binary
+    if b"\0" in content:
+        return None
+    if LANGUAGE_MARKERS[lang].search(content):
+        return lang
+    return None
+
+# Language shares settle long before every file of a large repository is read
+DEFAULT_LANGUAGE_SAMPLE_LIMIT = 5000
+
+def group_files_by_content(repo_path: str, extensions: frozenset) -> Dict[str, List[str]]:
+    """Group the tracked files with the given extensions by blob id, as paths relative to the repository."""
+    groups = {}
+    for path, _, blob in list_tracked_files(repo_path):
+        if os.path.splitext(path)[1] in extensions:
+            groups.setdefault(blob, []).append(path)
+    return groups
+
+def detect_repository_languages(repo_path: str, sample_limit: int = DEFAULT_LANGUAGE_SAMPLE_LIMIT) -> Dict[str, float]:
     """
     Detect programming languages used in the repository.
     Returns a dictionary of language -> confidence score (0-1).
@@ -468,31 +1467,36 @@ def detect_repository_languages(repo_path: str) -> Dict[str, float]:
     language_confidence = {}
     total_files = 0
 
-    for root, _, files in os.walk(repo_path):
-        if '.git' in root:
+    # git already has the inventory and sizes, so no directory walk or stat is needed
+    candidates = []
+    for path, size, _ in list_tracked_files(repo_path):
+        # Match whole path components so names like "foo.git/" are not skipped
+        if any(part.startswith('.git') for part in path.split('/')[:-1]):
             continue
-            
-        for file in files:
-            file_path = os.path.join(root, file)
-            _, ext = os.path.splitext(file_path)
-            
-            # Skip files larger than 1MB
-            if os.path.getsize(file_path) > 1_000_000:
-                continue
 
-            # Check file extension
-            for lang, patterns in LANGUAGE_PATTERNS.items():
-                if ext in patterns['extensions']:
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            content = f.read(1024)  # Read first 1KB
-                            marker_count = sum(1 for marker in patterns['markers'] 
-                                            if marker in content)
-                            if marker_count > 0:
-                                file_count[lang] += 1
-                                total_files += 1
-                    except:
-                        continue
+        file_path = os.path.join(repo_path, path)
+        _, ext = os.path.splitext(file_path)
+
+        # Skip files larger than 1MB
+        if size > 1_000_000:
+            continue
+
+        # Check file extension
+        lang = EXTENSION_LANGUAGES.get(ext)
+        if lang:
+            candidates.append((file_path, lang))
+
+    # Probe an evenly spaced sample; paths arrive sorted, so taking the first
+    # files would over-represent whatever directory sorts first
+    if sample_limit and len(candidates) > sample_limit:
+        step = len(candidates) / sample_limit
+        candidates = [candidates[int(index * step)] for index in range(sample_limit)]
+
+    # Reading the file heads is independent per file, so the opens overlap
+    for lang in PROBE_POOL.map(probe_language_markers, candidates):
+        if lang:
+            file_count[lang] += 1
+            total_files += 1
 
     # Calculate confidence scores
     if total_files > 0:
@@ -501,7 +1505,7 @@ def detect_repository_languages(repo_path: str) -> Dict[str, float]:
 
     return language_confidence
 
-def get_analysis_tools(languages: Dict[str, float], min_confidence: float = 0.1) -> List[str]:
+def get_analysis_tools(languages: Dict[str, float], min_confidence: float = MIN_LANGUAGE_CONFIDENCE) -> List[str]:
     """Get appropriate analysis tools based on detected languages."""
     selected_tools = set()
     
@@ -521,65 +1525,261 @@ def run_language_specific_analysis(repo_path: str, language: str) -> Dict[str, A
     elif language == 'java':
         results['pmd'] = run_pmd_analysis(repo_path)
     elif language == 'python':
-        # Implement Python-specific analysis
+        # Implement Python-specific analysis; the two linters are independent
+        # processes, so bandit runs on the I/O pool while pylint runs here
+        bandit = IO_POOL.submit(run_bandit_analysis, repo_path)
         results['pylint'] = run_pylint_analysis(repo_path)
-        results['bandit'] = run_bandit_analysis(repo_path)
+        results['bandit'] = bandit.result()
     elif language == 'javascript':
         # Implement JavaScript-specific analysis
         results['eslint'] = run_eslint_analysis(repo_path)
     
     return results
 
+def get_tool_fingerprint(language: str) -> str:
+    """Fingerprint the installed analysis tools of a language from their paths and mtimes."""
+    # A stat per tool is enough to notice upgrades without launching anything
+    parts = []
+    for tool in ANALYSIS_TOOLS.get(language, []):
+        path = shutil.which(tool)
+        try:
+            parts.append(f"{tool}:{os.path.realpath(path)}:{os.stat(path).st_mtime_ns}" if path else f"{tool}:")
+        except OSError:
+            parts.append(f"{tool}:")
+    return hashlib.blake2b("\0".join(parts).encode(), digest_size=6).hexdigest()
+
+def run_cached_language_analysis(git_dir: str, repo_path: str, language: str) -> Dict[str, Any]:
+    """Run the analyses for a language, reusing results stored for the same tree."""
+    # Keyed by tree rather than commit, so commits that leave the sources unchanged hit
+    tree_sha = Git(repo_path).rev_parse("HEAD^{tree}")
+    cache_path = os.path.join(git_dir, f"argus-quality-{tree_sha}-{language}-{get_tool_fingerprint(language)}.json")
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    results = run_language_specific_analysis(repo_path, language)
+    # Failed or missing tools are retried next time rather than remembered
+    if any("error" in result for result in results.values() if isinstance(result, dict)):
+        return results
+    for stale_path in Path(git_dir).glob(f"argus-quality-*-{language}-*.json"):
+        if str(stale_path) != cache_path:
+            stale_path.unlink(missing_ok=True)
+    report = json.dumps(results)
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=git_dir, delete=False) as f:
+        f.write(report)
+    os.replace(f.name, cache_path)
+    # JSON turns keys such as PMD's integer priorities into strings; a fresh run returns
+    # the decoded report too, so it has the same shape as a later cache hit
+    return json.loads(report)
+
+# Complete code quality reports kept in memory, so repeat requests for an
+# unchanged tree skip the checkout and every analyzer
+MAX_CACHED_ANALYSES = 32
+ANALYSIS_CACHE: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+ANALYSIS_CACHE_LOCK = threading.Lock()
+
+def get_analysis_cache_key(repo: Repo, language: Optional[str]) -> Optional[tuple]:
+    """Key a code quality report on everything its result depends on, or None if that cannot be pinned."""
+    # A server's DB and a stale local DB both change underneath the security scan
+    try:
+        db_updated = os.stat(get_trivy_db_marker_path()).st_mtime_ns
+    except OSError:
+        return None
+    if TRIVY_SERVER or time.time() - db_updated / 1e9 >= TRIVY_DB_TTL_SECONDS:
+        return None
+    with get_object_lock(repo):
+        tree_sha = repo.head.commit.tree.hexsha
+    return (
+        repo.git_dir,
+        tree_sha,
+        language,
+        db_updated,
+        tuple(get_tool_fingerprint(lang) for lang in ANALYSIS_TOOLS)
+    )
+
+def get_cached_analysis(key: tuple) -> Optional[Dict[str, Any]]:
+    """Return a copy of a previously computed report, marking it as most recently used."""
+    with ANALYSIS_CACHE_LOCK:
+        results = ANALYSIS_CACHE.get(key)
+        if results is None:
+            return None
+        ANALYSIS_CACHE.move_to_end(key)
+    # Callers own what they are given, so nothing they change can reach the cache
+    return copy.deepcopy(results)
+
+def report_section_failed(section: Dict[str, Any]) -> bool:
+    """Check whether a report section, or any tool result inside it, holds an error."""
+    return "error" in section or any("error" in result for result in section.values() if isinstance(result, dict))
+
+def cache_analysis(key: tuple, results: Dict[str, Any]) -> None:
+    """Remember a report unless one of its analyzers failed, dropping the oldest over the limit."""
+    if any(report_section_failed(section) for section in [results["security_scan"], *results["analysis"].values()]):
+        return
+    # Keep a private copy, since the caller goes on to hand the report out
+    results = copy.deepcopy(results)
+    with ANALYSIS_CACHE_LOCK:
+        ANALYSIS_CACHE[key] = results
+        ANALYSIS_CACHE.move_to_end(key)
+        while len(ANALYSIS_CACHE) > MAX_CACHED_ANALYSES:
+            ANALYSIS_CACHE.popitem(last=False)
+
+def read_json_report(command: List[str]) -> Any:
+    """Run a tool and parse the JSON report on its stdout as it is written, or None if it printed nothing."""
+    # The report is parsed straight off the pipe, so its raw bytes are never held in memory
+    with open_tool_process(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL) as process:
+        if not process.stdout.peek(1):
+            return None
+        return next(ijson.items(process.stdout, "", use_float=True))
+
 def run_pylint_analysis(repo_path: str) -> Dict[str, Any]:
     """Run Pylint analysis on Python code."""
     try:
-        result = subprocess.run(
-            ["pylint", "--output-format=json", repo_path],
-            capture_output=True,
-            text=True
-        )
-        return json.loads(result.stdout) if result.stdout else {"error": "No output from pylint"}
+        report = read_json_report(["pylint", "--output-format=json", repo_path])
+        return report if report is not None else {"error": "No output from pylint"}
     except Exception as e:
         return {"error": f"Pylint analysis failed: {str(e)}"}
 
 def run_bandit_analysis(repo_path: str) -> Dict[str, Any]:
     """Run Bandit security analysis on Python code."""
     try:
-        result = subprocess.run(
-            ["bandit", "-r", "-f", "json", repo_path],
-            capture_output=True,
-            text=True
-        )
-        return json.loads(result.stdout) if result.stdout else {"error": "No output from bandit"}
+        report = read_json_report(["bandit", "-r", "-f", "json", repo_path])
+        return report if report is not None else {"error": "No output from bandit"}
     except Exception as e:
         return {"error": f"Bandit analysis failed: {str(e)}"}
 
 def run_eslint_analysis(repo_path: str) -> Dict[str, Any]:
     """Run ESLint analysis on JavaScript/TypeScript code."""
     try:
-        result = subprocess.run(
-            ["eslint", "-f", "json", repo_path],
-            capture_output=True,
-            text=True
-        )
-        return json.loads(result.stdout) if result.stdout else {"error": "No output from eslint"}
+        report = read_json_report(["eslint", "-f", "json", repo_path])
+        return report if report is not None else {"error": "No output from eslint"}
     except Exception as e:
         return {"error": f"ESLint analysis failed: {str(e)}"}
 
+def read_repository_file(tree: Any, file_path: str) -> str:
+    """Read a file from a commit tree, returning an error message on failure."""
+    entry = get_tree_entry(tree, file_path.strip("/"))
+
+    # Check if file exists
+    if entry is None or entry.type != "blob":
+        return "Error: File not found"
+
+    try:
+        return read_git_object(entry).decode('utf-8', errors='replace')
+    except Exception as e:
+        return f"Error reading file: {str(e)}"
+
+def read_repository_files(repo: Repo, file_paths: List[str]) -> Dict[str, str]:
+    """Read several files from the HEAD commit of a cloned repository."""
+    # Blobs are streamed from the object store over one persistent
+    # `git cat-file --batch` pipe, which serializes the reads
+    with get_object_lock(repo):
+        tree = repo.head.commit.tree
+        return {file_path: read_repository_file(tree, file_path) for file_path in file_paths}
+
+def list_branches(repo: Repo) -> List[str]:
+    """List the local branch names of a cloned repository."""
+    # One for-each-ref call instead of building a Head object per branch
+    return repo.git.for_each_ref("refs/heads", format="%(refname:short)").splitlines()
+
+def list_remote_branches(authenticated_url: str) -> List[str]:
+    """List the branch names of a remote repository without cloning it."""
+    with NETWORK_SLOTS:
+        refs = Git().ls_remote("--heads", authenticated_url)
+    return [line.split("\trefs/heads/", 1)[1] for line in refs.splitlines() if "\trefs/heads/" in line]
+
+def list_commits(repo: Repo, branch: Optional[str], max_count: int) -> List[dict]:
+    """Describe the most recent commits of a cloned repository's branch."""
+    # One `git log` call with unit/record separators instead of decoding each commit object;
+    # the branch is read as a rev so the working tree is never checked out
+    raw = repo.git.log(f"--max-count={max_count}", "--format=%H%x1f%an%x1f%ae%x1f%cI%x1f%B%x1e", branch or "HEAD", "--")
+    commits = []
+    for record in raw.split("\x1e"):
+        if not record.strip():
+            continue
+        hexsha, author_name, author_email, date, message = record.lstrip("\n").split("\x1f", 4)
+        commits.append({
+            'hash': hexsha,
+            'author': f"{author_name} <{author_email}>",
+            'date': date,
+            'message': message.strip()
+        })
+
+    return commits
+
+def fetch_branches(repo: Repo) -> Dict[str, Any]:
+    """Fetch every remote of a cloned repository and list its branches."""
+    # Fetch all remotes and their branches. This already runs on the I/O pool, so the
+    # fetches run here in turn; waiting on more pool tasks could starve the pool
+    for remote in repo.remotes:
+        with NETWORK_SLOTS:
+            remote.fetch()
+    refresh_cached_size(repo)
+
+    # Get all branches (both local and remote) from a single ref listing
+    branches = {"local": [], "remote": [], "current": repo.active_branch.name}
+    refs = repo.git.for_each_ref("refs/heads", f"refs/remotes/{repo.remote().name}", format="%(refname)")
+    for ref in refs.splitlines():
+        if ref.startswith("refs/heads/"):
+            branches["local"].append(ref[len("refs/heads/"):])
+        elif not ref.endswith("/HEAD"):
+            branches["remote"].append(ref[len("refs/remotes/"):])
+    return branches
+
+def add_worktree(repo: Repo) -> str:
+    """Check out a clone's current commit into a private worktree and return its path."""
+    path = tempfile.mkdtemp(dir=WORKTREE_ROOT)
+    # A prune running while another worktree is being added deletes that
+    # worktree's half-written record, so changes to the records are serialized
+    with get_clone_lock(f"worktree:{repo.git_dir}"):
+        # Drop records of worktrees whose directories are already gone
+        repo.git.worktree("prune")
+        # git resolves HEAD itself, so the shared cat-file pipe is not touched here
+        repo.git.worktree("add", "--detach", path, "HEAD")
+    return path
+
+def remove_worktree(repo: Repo, path: str) -> None:
+    """Delete a worktree created by add_worktree."""
+    try:
+        with get_clone_lock(f"worktree:{repo.git_dir}"):
+            repo.git.worktree("remove", "--force", path)
+    except GitCommandError:
+        shutil.rmtree(path, ignore_errors=True)
+
+@contextlib.asynccontextmanager
+async def worktree_checkout(repo: Repo) -> Any:
+    """Provide a private worktree of a shared clone for the duration of a block."""
+    path = await run_blocking(add_worktree, repo)
+    try:
+        yield path
+    finally:
+        await run_blocking(remove_worktree, repo, path)
+
 def format_trivy_results(scan_results: Dict[str, Any]) -> Dict[str, Any]:
     """Format Trivy scan results for Teams message."""
-    vulnerabilities = scan_results.get("vulnerabilities", [])
+    severities = Counter(
+        vulnerability.get("Severity")
+        for result in scan_results.get("Results", [])
+        for vulnerability in result.get("Vulnerabilities", [])
+    )
     
     return {
-        "Total Vulnerabilities": len(vulnerabilities),
-        "Critical": sum(1 for v in vulnerabilities if v.get("severity") == "CRITICAL"),
-        "High": sum(1 for v in vulnerabilities if v.get("severity") == "HIGH"),
-        "Medium": sum(1 for v in vulnerabilities if v.get("severity") == "MEDIUM"),
-        "Low": sum(1 for v in vulnerabilities if v.get("severity") == "LOW")
+        "Total Vulnerabilities": sum(severities.values()),
+        "Critical": severities["CRITICAL"],
+        "High": severities["HIGH"],
+        "Medium": severities["MEDIUM"],
+        "Low": severities["LOW"]
     }
 
 @mcp.tool()
-def analyze_repository_structure(*, repo_url: str, gitlab_credentials: Optional[Union[str, dict]] = None, branch: Optional[str] = None) -> str:
+async def analyze_repository_structure(*,
+    repo_url: str,
+    gitlab_credentials: Optional[Union[str, dict]] = None,
+    branch: Optional[str] = None,
+    max_entries: int = DEFAULT_TREE_MAX_ENTRIES,
+    max_depth: int = DEFAULT_TREE_MAX_DEPTH
+) -> str:
     """
     Generate a tree representation of a repository's file structure.
     
@@ -587,66 +1787,52 @@ def analyze_repository_structure(*, repo_url: str, gitlab_credentials: Optional[
         repo_url: Repository URL to analyze
         gitlab_credentials: Optional GitLab token string or credentials dict
         branch: Optional branch name to clone
+        max_entries: Maximum number of lines before the tree is truncated
+        max_depth: Maximum directory depth to expand
     """
     try:
         creds = create_gitlab_credentials(gitlab_credentials)
-        repo_path = clone_repo(repo_url, creds, branch)
-        tree = get_directory_tree(repo_path)
-        return tree
+        async with cached_repo(repo_url, creds, branch) as repo:
+            # rev-parse runs as its own process rather than reading through the shared cat-file pipe
+            head_sha = await run_blocking(repo.git.rev_parse, "HEAD")
+            return await run_blocking(get_repository_tree, repo.working_tree_dir, head_sha, max_entries, max_depth)
     except Exception as e:
         return f"Repository analysis failed: {str(e)}"
 
 @mcp.tool()
-def inspect_repository_files(*, repo_url: str, file_paths: List[str], gitlab_credentials: Optional[Union[str, dict]] = None, branch: Optional[str] = None) -> dict[str, str]:
+async def inspect_repository_files(*, repo_url: str, file_paths: List[str], gitlab_credentials: Optional[Union[str, dict]] = None, branch: Optional[str] = None) -> dict[str, str]:
     """Extract and return contents of specified repository files."""
     # Log the input arguments
-    print(f"inspect_repository_files called with repo_url={repo_url}, file_paths={file_paths}, gitlab_credentials={gitlab_credentials}")
+    logger.debug("inspect_repository_files called with repo_url=%s, file_paths=%s", repo_url, file_paths)
     
     try:
         creds = create_gitlab_credentials(gitlab_credentials)
-        repo_path = clone_repo(repo_url, creds, branch)
-        results = {}
-        
-        for file_path in file_paths:
-            full_path = os.path.join(repo_path, file_path)
-            
-            # Check if file exists
-            if not os.path.isfile(full_path):
-                results[file_path] = f"Error: File not found"
-                continue
-                
-            try:
-                with open(full_path, 'r', encoding='utf-8') as f:
-                    results[file_path] = f.read()
-            except Exception as e:
-                results[file_path] = f"Error reading file: {str(e)}"
-        
-        return results
+        async with cached_repo(repo_url, creds, branch) as repo:
+            return await run_blocking(read_repository_files, repo, file_paths)
             
     except Exception as e:
         return {"error": f"Repository inspection failed: {str(e)}"}
 
 @mcp.tool()
-def enumerate_branches(*, repo_url: str, gitlab_credentials: Optional[Union[str, dict]] = None) -> List[str]:
+async def enumerate_branches(*, repo_url: str, gitlab_credentials: Optional[Union[str, dict]] = None) -> List[str]:
     """Retrieve all branch names from a repository."""
     try:
         creds = create_gitlab_credentials(gitlab_credentials)
-        repo_path = clone_repo(repo_url, creds)
-        repo = Repo(repo_path)
-        
-        # Get list of branches
-        branches = [branch.name for branch in repo.branches]
-        return branches
+        # Branch names come straight from the remote; no clone is needed
+        authenticated_url = get_authenticated_url(repo_url, creds)
+        return await run_blocking(list_remote_branches, authenticated_url)
             
     except Exception as e:
         return [f"Branch enumeration failed: {str(e)}"]
 
 @mcp.tool()
-def compare_git_changes(*, 
+async def compare_git_changes(*, 
     repo_url: str, 
     source: Optional[str] = None, 
     target: Optional[str] = None,
     file_path: Optional[str] = None,
+    name_only: bool = False,
+    context_lines: int = 3,
     gitlab_credentials: Optional[Union[str, dict]] = None
 ) -> str:
     """
@@ -657,18 +1843,22 @@ def compare_git_changes(*,
         source: Source branch/commit (default: current HEAD)
         target: Target branch/commit (default: previous commit)
         file_path: Specific file to compare (optional)
+        name_only: List only the changed paths, one per line (default: False)
+        context_lines: Unchanged lines shown around each change; 0 for changes only (default: 3)
         gitlab_credentials: Optional GitLab credentials
     """
     try:
         creds = create_gitlab_credentials(gitlab_credentials)
-        repo_path = clone_repo(repo_url, creds)
-        return get_diff_changes(repo_path, source, target, file_path)
+        # Branch tips and their parents cover the common cases; older
+        # revisions pull in the full history on demand
+        async with cached_repo(repo_url, creds, depth=2, single_branch=False) as repo:
+            return await run_blocking(get_diff_changes, repo, source, target, file_path, name_only, max(context_lines, 0))
         
     except Exception as e:
         return f"Comparison failed: {str(e)}"
 
 @mcp.tool()
-def get_commit_history(*, 
+async def get_commit_history(*, 
     repo_url: str, 
     branch: Optional[str] = None,
     max_count: int = 10,
@@ -685,28 +1875,14 @@ def get_commit_history(*,
     """
     try:
         creds = create_gitlab_credentials(gitlab_credentials)
-        repo_path = clone_repo(repo_url, creds, branch)
-        repo = Repo(repo_path)
-        
-        if (branch):
-            repo.git.checkout(branch)
-            
-        commits = []
-        for commit in repo.iter_commits(max_count=max_count):
-            commits.append({
-                'hash': commit.hexsha,
-                'author': f"{commit.author.name} <{commit.author.email}>",
-                'date': commit.committed_datetime.isoformat(),
-                'message': commit.message.strip()
-            })
-            
-        return commits
+        async with cached_repo(repo_url, creds, branch, depth=max(max_count, 1)) as repo:
+            return await run_blocking(list_commits, repo, branch, max_count)
             
     except Exception as e:
         return [{'error': f"Failed to get commit history: {str(e)}"}]
 
 @mcp.tool()
-def security_scan_repository(*, 
+async def security_scan_repository(*, 
     repo_url: str,
     scan_type: str = "trivy",
     gitlab_credentials: Optional[Union[str, dict]] = None,
@@ -715,12 +1891,11 @@ def security_scan_repository(*,
     """Perform security scanning on a repository using Trivy."""
     try:
         creds = create_gitlab_credentials(gitlab_credentials)
-        repo_path = clone_repo(repo_url, creds, branch)
-        
         if scan_type != "trivy":
             return {"error": "Only Trivy scanning is supported"}
             
-        scan_results = run_trivy_scan(repo_path)
+        async with cached_repo(repo_url, creds, branch) as repo, worktree_checkout(repo) as repo_path:
+            scan_results = await run_scan(run_trivy_scan, repo_path)
         return {
             "trivy_scan": scan_results,
             "summary": format_trivy_results(scan_results)
@@ -730,7 +1905,7 @@ def security_scan_repository(*,
         return {"error": f"Security scan failed: {str(e)}"}
 
 @mcp.tool()
-def fetch_all_branches(*, repo_url: str, gitlab_credentials: Optional[Union[str, dict]] = None) -> Dict[str, Any]:
+async def fetch_all_branches(*, repo_url: str, gitlab_credentials: Optional[Union[str, dict]] = None) -> Dict[str, Any]:
     """
     Fetch all branches from a repository and ensure they are up to date.
     
@@ -743,19 +1918,8 @@ def fetch_all_branches(*, repo_url: str, gitlab_credentials: Optional[Union[str,
     """
     try:
         creds = create_gitlab_credentials(gitlab_credentials)
-        repo_path = clone_repo(repo_url, creds)
-        repo = Repo(repo_path)
-        
-        # Fetch all remotes and their branches
-        for remote in repo.remotes:
-            remote.fetch()
-            
-        # Get all branches (both local and remote)
-        branches = {
-            "local": [branch.name for branch in repo.heads],
-            "remote": [ref.name for ref in repo.remote().refs if not ref.name.endswith('/HEAD')],
-            "current": repo.active_branch.name
-        }
+        async with cached_repo(repo_url, creds, single_branch=False) as repo:
+            branches = await run_blocking(fetch_branches, repo)
         
         return {
             "status": "success",
@@ -780,12 +1944,22 @@ def analyze_pmd_violations(pmd_output: str) -> str:
 PMD output:
 {pmd_output}"""
 
+async def report_component_status(ctx: Context, name: str, result: Dict[str, Any], completed: int, total: int) -> None:
+    """Tell the client that one analysis finished, without ever failing the analysis itself."""
+    status = "finished with errors" if report_section_failed(result) else "finished"
+    try:
+        await ctx.report_progress(completed, total)
+        await ctx.info(f"{name} {status} ({completed}/{total})")
+    except Exception as e:
+        logger.debug("Could not report progress of %s: %s", name, e)
+
 @mcp.tool()
-def analyze_code_quality(*,
+async def analyze_code_quality(*,
     repo_url: str,
     language: Optional[str] = None,
     gitlab_credentials: Optional[Union[str, dict]] = None,
-    branch: Optional[str] = None
+    branch: Optional[str] = None,
+    ctx: Context
 ) -> Dict[str, Any]:
     """
     Analyze code quality with automatic language detection and tool selection.
@@ -795,48 +1969,81 @@ def analyze_code_quality(*,
         language: Optional language override
         gitlab_credentials: Optional GitLab credentials
         branch: Optional branch name to clone
+        ctx: MCP request context, injected by FastMCP; used to report progress as each analysis finishes
         
     Returns:
         Dictionary containing analysis results
     """
     try:
         creds = create_gitlab_credentials(gitlab_credentials)
-        repo_path = clone_repo(repo_url, creds, branch)
-        
-        # Detect languages if not specified
-        if not language:
-            detected_languages = detect_repository_languages(repo_path)
-            if not detected_languages:
-                return {
-                    "status": "error",
-                    "error": "No supported programming languages detected"
+        async with cached_repo(repo_url, creds, branch) as repo:
+
+            cache_key = await run_blocking(get_analysis_cache_key, repo, language and language.lower())
+            cached = cache_key and get_cached_analysis(cache_key)
+            if cached:
+                return cached
+
+            # Scanners read files for minutes, so give them a checkout that a
+            # concurrent fetch of the shared clone cannot move underneath them
+            async with worktree_checkout(repo) as repo_path:
+                # Detect languages if not specified
+                if not language:
+                    detected_languages = await run_blocking(detect_repository_languages, repo_path)
+                    if not detected_languages:
+                        return {
+                            "status": "error",
+                            "error": "No supported programming languages detected"
+                        }
+                else:
+                    detected_languages = {language.lower(): 1.0}
+
+                # Only analyze languages above the confidence threshold
+                languages = [lang for lang, confidence in detected_languages.items() if confidence >= MIN_LANGUAGE_CONFIDENCE]
+
+                # Get appropriate analysis tools
+                tools = get_analysis_tools({lang: detected_languages[lang] for lang in languages})
+                if not tools:
+                    return {
+                        "status": "error",
+                        "error": "No suitable analysis tools found for detected languages"
+                    }
+
+                # Run analysis for each detected language
+                results = {
+                    "status": "success",
+                    "languages": detected_languages,
+                    "analysis": {}
                 }
-        else:
-            detected_languages = {language.lower(): 1.0}
-        
-        # Get appropriate analysis tools
-        tools = get_analysis_tools(detected_languages)
-        if not tools:
-            return {
-                "status": "error",
-                "error": "No suitable analysis tools found for detected languages"
-            }
-        
-        # Run analysis for each detected language
-        results = {
-            "status": "success",
-            "languages": detected_languages,
-            "analysis": {}
-        }
-        
-        for lang, confidence in detected_languages.items():
-            if confidence >= 0.1:  # Only analyze if confidence is above 10%
-                results["analysis"][lang] = run_language_specific_analysis(repo_path, lang)
-        
-        # Always run Trivy for security scanning
-        results["security_scan"] = run_trivy_scan(repo_path)
-        
-        return results
+
+                # Always run Trivy for security scanning, alongside the language analyses;
+                # a failing analyzer only fills in its own entry, so the others still report
+                components = {
+                    asyncio.ensure_future(run_scan_component(f"{lang} analysis", run_cached_language_analysis, repo.git_dir, repo_path, lang)): (lang, f"{lang} analysis")
+                    for lang in languages
+                }
+                components[asyncio.ensure_future(run_scan_component("Trivy scan", run_trivy_scan, repo_path))] = ("security_scan", "Trivy scan")
+                analyses = {}
+                pending = set(components)
+                completed = 0
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        # Several components can finish together, so count each one as it is reported
+                        completed += 1
+                        component, name = components[task]
+                        if component == "security_scan":
+                            results["security_scan"] = task.result()
+                        else:
+                            analyses[component] = task.result()
+                        # Only a one-line status goes out early; the results themselves are in the returned report
+                        await report_component_status(ctx, name, task.result(), completed, len(components))
+                results["analysis"] = {lang: analyses[lang] for lang in languages}
+
+                # Only remember the report if a concurrent fetch did not move the checkout off the keyed tree
+                if cache_key and await run_blocking(Git(repo_path).rev_parse, "HEAD^{tree}") == cache_key[1]:
+                    cache_analysis(cache_key, results)
+
+            return results
             
     except Exception as e:
         return {
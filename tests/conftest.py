@@ -0,0 +1,102 @@
+import os
+import subprocess
+import tempfile
+
+import pytest
+
+# The module reads its cache locations at import, so point them at scratch
+# directories before any test imports it
+os.environ.setdefault("ARGUS_CACHE_DIR", tempfile.mkdtemp(prefix="argus-test-cache-"))
+os.environ.setdefault("ARGUS_TRIVY_CACHE_DIR", tempfile.mkdtemp(prefix="argus-test-trivy-"))
+
+GIT_IDENTITY = {
+    "GIT_AUTHOR_NAME": "Argus Test",
+    "GIT_AUTHOR_EMAIL": "argus@example.com",
+    "GIT_COMMITTER_NAME": "Argus Test",
+    "GIT_COMMITTER_EMAIL": "argus@example.com",
+}
+
+
+def git(cwd, *args):
+    """Run a git command in a test repository and return its output."""
+    return subprocess.run(
+        ["git", *args], cwd=cwd, check=True, capture_output=True, text=True,
+        env={**os.environ, **GIT_IDENTITY}
+    ).stdout.strip()
+
+
+def commit_files(repo_path, files, message):
+    """Write files into a test repository and commit them."""
+    for path, content in files.items():
+        full_path = os.path.join(repo_path, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w") as f:
+            f.write(content)
+    git(repo_path, "add", "-A")
+    git(repo_path, "commit", "-q", "-m", message)
+    return git(repo_path, "rev-parse", "HEAD")
+
+
+class RecordingContext:
+    """Stands in for the FastMCP request context and records what is sent to the client."""
+
+    def __init__(self):
+        self.progress = []
+        self.messages = []
+
+    async def report_progress(self, progress, total=None):
+        self.progress.append((progress, total))
+
+    async def info(self, message):
+        self.messages.append(message)
+
+
+@pytest.fixture
+def source_repo(tmp_path):
+    """A small repository with two commits to clone from."""
+    path = str(tmp_path / "source")
+    os.makedirs(path)
+    git(path, "init", "-q", "-b", "main")
+    commit_files(path, {"README.md": "hello\n", "src/app.py": "import os\n"}, "initial")
+    commit_files(path, {"src/app.py": "import os\nimport sys\n", "docs/guide.md": "guide\n"}, "second")
+    return path
+
+
+@pytest.fixture
+def fake_tools(tmp_path, monkeypatch):
+    """Put stand-in analyzer scripts first on PATH; returns a function that writes one."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+    def write_tool(name, script):
+        tool = bin_dir / name
+        tool.write_text(f"#!/bin/sh\n{script}\n")
+        tool.chmod(0o755)
+
+    write_tool("trivy", """echo '{"Results": [{"Target": "requirements.txt", "Vulnerabilities": [{"VulnerabilityID": "CVE-1", "Severity": "HIGH"}]}]}'""")
+    write_tool("pylint", "echo '[]'")
+    write_tool("bandit", """echo '{"results": []}'""")
+    return write_tool
+
+
+# Stand-in PMD: one violation per file in the --file-list it is given
+FAKE_PMD = r"""
+while [ $# -gt 0 ]; do [ "$1" = --file-list ] && list="$2"; shift; done
+echo '<pmd xmlns="http://pmd.sourceforge.net/report/2.0.0">'
+while read -r file || [ -n "$file" ]; do
+  echo "<file name=\"$file\"><violation beginline=\"1\" endline=\"2\" rule=\"R\" ruleset=\"S\" priority=\"3\">m</violation></file>"
+done < "$list"
+echo '</pmd>'
+"""
+
+
+@pytest.fixture
+def java_repo(tmp_path):
+    """A repository holding a Java file and an identical vendored copy of it."""
+    path = str(tmp_path / "java")
+    os.makedirs(path)
+    git(path, "init", "-q", "-b", "main")
+    source = "package app;\npublic class App {}\n"
+    commit_files(path, {"src/App.java": source, "vendor/App.java": source, "README.md": "java\n"}, "initial")
+    return path
@@ -0,0 +1,121 @@
+import asyncio
+import os
+
+import pytest
+
+from panopticon import main
+
+from conftest import commit_files, git
+
+
+def make_source(tmp_path, name):
+    """Create a one-commit repository to clone from."""
+    path = str(tmp_path / name)
+    os.makedirs(path)
+    git(path, "init", "-q", "-b", "main")
+    commit_files(path, {"README.md": f"{name}\n"}, "initial")
+    return path
+
+
+def test_clone_is_reused(source_repo):
+    first = main.clone_repo(source_repo)
+    second = main.clone_repo(source_repo)
+
+    assert first is second
+
+
+def test_eviction_skips_clones_in_use(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "MAX_CACHED_REPOS", 1)
+    first, second, third = (make_source(tmp_path, name) for name in ("first", "second", "third"))
+
+    async def scenario():
+        async with main.cached_repo(first) as held:
+            # Over budget, but the only older clone is in use
+            await main.run_blocking(main.clone_repo, second)
+            assert os.path.isdir(held.working_tree_dir)
+        # Once released it is the least recently used idle clone
+        await main.run_blocking(main.clone_repo, third)
+        return held
+
+    held = asyncio.run(scenario())
+
+    assert not os.path.exists(held.working_tree_dir)
+    assert main.get_clone_location(first, None, None)[1] not in main.REPO_CACHE
+
+
+def test_eviction_skips_clones_with_worktrees(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "MAX_CACHED_REPOS", 1)
+    first, second = make_source(tmp_path, "first"), make_source(tmp_path, "second")
+    repo = main.clone_repo(first)
+    path = main.add_worktree(repo)
+    try:
+        main.clone_repo(second)
+        assert os.path.isdir(repo.working_tree_dir)
+        with open(os.path.join(path, "README.md")) as f:
+            assert f.read() == "first\n"
+    finally:
+        main.remove_worktree(repo, path)
+
+
+def test_fetch_all_branches_with_a_saturated_pool(source_repo, monkeypatch):
+    """Listing branches runs entirely on its own pool thread, so a pool of one is enough."""
+    git(source_repo, "branch", "feature")
+    monkeypatch.setattr(main, "IO_POOL", main.ThreadPoolExecutor(max_workers=1))
+
+    result = asyncio.run(asyncio.wait_for(main.fetch_all_branches(repo_url=source_repo), timeout=60))
+
+    assert result["status"] == "success"
+    assert sorted(result["branches"]["remote"]) == ["origin/feature", "origin/main"]
+
+
+def test_failed_fetch_keeps_a_held_clone(source_repo, monkeypatch):
+    """A fetch that fails while another call holds the clone serves the last fetched state."""
+    monkeypatch.setattr(main, "FETCH_TTL_SECONDS", 0)
+
+    async def scenario():
+        async with main.cached_repo(source_repo) as held:
+            async with main.worktree_checkout(held) as path:
+                # The remote disappears, so the next update cannot fetch
+                os.rename(source_repo, f"{source_repo}.gone")
+                again = await main.run_blocking(main.clone_repo, source_repo)
+                with open(os.path.join(path, "src", "app.py")) as f:
+                    return held, again, f.read()
+
+    held, again, content = asyncio.run(scenario())
+
+    assert again is held
+    assert os.path.isdir(held.git_dir)
+    assert content == "import os\nimport sys\n"
+
+
+def test_broken_clone_in_use_is_not_deleted(source_repo, monkeypatch):
+    """A clone whose HEAD no longer resolves is only rebuilt once nobody holds it."""
+    monkeypatch.setattr(main, "FETCH_TTL_SECONDS", 0)
+
+    async def scenario():
+        async with main.cached_repo(source_repo) as held:
+            with open(os.path.join(held.git_dir, "HEAD"), "w") as f:
+                f.write("0" * 40 + "\n")
+            with pytest.raises(Exception):
+                await main.run_blocking(main.clone_repo, source_repo)
+            assert os.path.isdir(held.git_dir)
+        return held, await main.run_blocking(main.clone_repo, source_repo)
+
+    held, rebuilt = asyncio.run(scenario())
+
+    assert rebuilt is not held
+    assert git(rebuilt.working_tree_dir, "log", "-1", "--format=%s") == "second"
+
+
+def test_cached_size_follows_fetches(source_repo, monkeypatch):
+    """The byte budget sees what a fetch added to a clone, not only its size when first cached."""
+    monkeypatch.setattr(main, "FETCH_TTL_SECONDS", 0)
+    repo = main.clone_repo(source_repo)
+    repo_hash = main.get_clone_location(source_repo, None, None)[1]
+    before = main.REPO_CACHE_SIZES[repo_hash]
+
+    commit_files(source_repo, {"data.bin": "x" * 200_000}, "large file")
+    main.clone_repo(source_repo)
+
+    assert main.REPO_CACHE_SIZES[repo_hash] >= before + 200_000
+    assert main.REPO_CACHE_SIZES[repo_hash] == main.get_directory_size(repo.working_tree_dir)
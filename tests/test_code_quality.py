@@ -0,0 +1,87 @@
+import asyncio
+
+from panopticon import main
+
+from conftest import RecordingContext, commit_files
+
+
+class DisconnectedContext:
+    """A request context whose notifications all fail."""
+
+    async def report_progress(self, progress, total=None):
+        raise ValueError("Context is not available outside of a request")
+
+    async def info(self, message):
+        raise ValueError("Context is not available outside of a request")
+
+
+def test_reports_a_short_status_per_component(source_repo, fake_tools):
+    ctx = RecordingContext()
+
+    result = asyncio.run(main.analyze_code_quality(repo_url=source_repo, language="python", ctx=ctx))
+
+    assert result["status"] == "success"
+    assert ctx.progress == [(1, 2), (2, 2)]
+    # Components finish in either order; each gets one status line and no payload
+    assert sorted(message.split(" (")[0] for message in ctx.messages) == ["Trivy scan finished", "python analysis finished"]
+
+
+def test_failed_notifications_keep_the_report(source_repo, fake_tools):
+    result = asyncio.run(main.analyze_code_quality(repo_url=source_repo, language="python", ctx=DisconnectedContext()))
+
+    assert result["status"] == "success"
+    assert result["analysis"]["python"] == {"pylint": [], "bandit": {"results": []}}
+    assert result["security_scan"]["Results"][0]["Vulnerabilities"][0]["VulnerabilityID"] == "CVE-1"
+
+
+def test_cached_report_is_not_shared_with_callers(source_repo, fake_tools):
+    """Changing a returned report leaves the cached one, and later callers' copies, intact."""
+    def analyze(ctx):
+        return asyncio.run(main.analyze_code_quality(repo_url=source_repo, language="python", ctx=ctx))
+
+    # The first call downloads the Trivy DB, which the cache key depends on
+    analyze(RecordingContext())
+    first = analyze(RecordingContext())
+    first["security_scan"]["Results"].clear()
+    second = analyze(RecordingContext())
+    second["analysis"]["python"]["pylint"].append("changed")
+    ctx = RecordingContext()
+    third = analyze(ctx)
+
+    # No component ran for the last call, so it was answered from the cache
+    assert ctx.progress == []
+    assert second["security_scan"]["Results"][0]["Vulnerabilities"][0]["VulnerabilityID"] == "CVE-1"
+    assert third["analysis"]["python"] == {"pylint": [], "bandit": {"results": []}}
+    assert third["security_scan"]["Results"][0]["Vulnerabilities"][0]["VulnerabilityID"] == "CVE-1"
+
+
+def test_new_commit_misses_the_analysis_cache(source_repo, fake_tools, monkeypatch):
+    """A report is reused for the same tree and computed again once the sources change."""
+    def analyze():
+        ctx = RecordingContext()
+        asyncio.run(main.analyze_code_quality(repo_url=source_repo, language="python", ctx=ctx))
+        return ctx.progress
+
+    # The first call downloads the Trivy DB, which the cache key depends on
+    analyze()
+    analyze()
+    assert analyze() == []
+
+    commit_files(source_repo, {"src/app.py": "import os\nimport json\n"}, "third")
+    # Fetch the new commit into the cached clone on the next call
+    monkeypatch.setattr(main, "FETCH_TTL_SECONDS", 0)
+
+    assert analyze() == [(1, 2), (2, 2)]
+
+
+def test_components_finishing_together_each_advance_progress(source_repo, fake_tools, monkeypatch):
+    """Progress counts every component, even when several complete in the same wait."""
+    async def finished_component(name, func, *args):
+        return {}
+
+    monkeypatch.setattr(main, "run_scan_component", finished_component)
+    ctx = RecordingContext()
+
+    asyncio.run(main.analyze_code_quality(repo_url=source_repo, language="python", ctx=ctx))
+
+    assert ctx.progress == [(1, 2), (2, 2)]
@@ -0,0 +1,39 @@
+import asyncio
+
+from panopticon import main
+
+
+def test_mixed_tool_calls_on_one_clone(source_repo):
+    """Concurrent calls against a shared clone neither hang nor mix up each other's objects."""
+    async def read_worktree():
+        repo = await main.run_blocking(main.clone_repo, source_repo)
+        async with main.worktree_checkout(repo) as path:
+            with open(f"{path}/src/app.py") as f:
+                return f.read()
+
+    async def run_calls():
+        calls = []
+        for index in range(60):
+            kind = index % 4
+            if kind == 0:
+                calls.append(main.analyze_repository_structure(repo_url=source_repo))
+            elif kind == 1:
+                calls.append(main.inspect_repository_files(repo_url=source_repo, file_paths=["README.md", "src/app.py"]))
+            elif kind == 2:
+                calls.append(main.compare_git_changes(repo_url=source_repo, name_only=True))
+            else:
+                calls.append(read_worktree())
+        return await asyncio.wait_for(asyncio.gather(*calls), timeout=60)
+
+    results = asyncio.run(run_calls())
+
+    for index, result in enumerate(results):
+        kind = index % 4
+        if kind == 0:
+            assert "README.md" in result and "app.py" in result
+        elif kind == 1:
+            assert result == {"README.md": "hello\n", "src/app.py": "import os\nimport sys\n"}
+        elif kind == 2:
+            assert result.splitlines() == ["docs/guide.md", "src/app.py"]
+        else:
+            assert result == "import os\nimport sys\n"
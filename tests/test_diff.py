@@ -0,0 +1,106 @@
+import asyncio
+import os
+
+from panopticon import main
+
+from conftest import commit_files, git
+
+
+def make_history(tmp_path):
+    """A repository with four commits and a tag on the first, served over file:// so clones stay shallow."""
+    path = str(tmp_path / "history")
+    os.makedirs(path)
+    git(path, "init", "-q", "-b", "main")
+    shas = [commit_files(path, {"notes.txt": f"{index}\n"}, f"commit {index}") for index in range(4)]
+    git(path, "tag", "v0", shas[0])
+    return f"file://{path}", shas
+
+
+def compare(url, **kwargs):
+    return asyncio.run(main.compare_git_changes(repo_url=url, name_only=True, **kwargs))
+
+
+def test_default_diff_is_against_the_parent(tmp_path):
+    url, _ = make_history(tmp_path)
+
+    assert compare(url) == "notes.txt"
+
+
+def test_unknown_revision_does_not_unshallow(tmp_path):
+    url, _ = make_history(tmp_path)
+
+    result = compare(url, target="no-such-branch")
+
+    repo = main.clone_repo(url, depth=2, single_branch=False)
+    assert result.startswith("Error generating diff")
+    assert main.is_shallow_repo(repo)
+
+
+def test_missing_commit_and_tag_are_fetched(tmp_path):
+    url, shas = make_history(tmp_path)
+
+    assert compare(url, target=shas[0]) == "notes.txt"
+    assert compare(url, target="v0") == "notes.txt"
+    repo = main.clone_repo(url, depth=2, single_branch=False)
+    assert main.is_shallow_repo(repo)
+
+
+def test_diff_cache_is_keyed_on_commits(tmp_path):
+    url, shas = make_history(tmp_path)
+    compare(url, source=shas[3], target=shas[2])
+
+    repo = main.clone_repo(url, depth=2, single_branch=False)
+    key = (repo.git_dir, shas[2], shas[3], None, True, 3)
+    assert main.get_cached_diff(key) == "notes.txt"
+
+
+def test_names_resolve_to_exact_remote_refs(tmp_path):
+    """A tag is not confused with a branch whose name merely ends in the same components."""
+    url, shas = make_history(tmp_path)
+    path = url.removeprefix("file://")
+    git(path, "tag", "v1", shas[1])
+    git(path, "branch", "release/v1", shas[2])
+
+    assert compare(url, source=shas[2], target="v1") == "notes.txt"
+    repo = main.clone_repo(url, depth=2, single_branch=False)
+    key = (repo.git_dir, shas[1], shas[2], None, True, 3)
+    assert main.get_cached_diff(key) == "notes.txt"
+
+
+def test_ambiguous_remote_name_is_rejected(tmp_path):
+    url, shas = make_history(tmp_path)
+    path = url.removeprefix("file://")
+    git(path, "tag", "v1", shas[1])
+    git(path, "branch", "v1", shas[0])
+
+    result = compare(url, target="v1")
+
+    assert result.startswith("Error generating diff") and "ambiguous" in result
+
+
+def test_patch_matches_git_diff(tmp_path):
+    """Patches are byte-identical to git's, hunk headers' function context included."""
+    path = str(tmp_path / "patch")
+    os.makedirs(path)
+    git(path, "init", "-q", "-b", "main")
+    body = "".join(f"    value_{index} = {index}\n" for index in range(12))
+    old = commit_files(path, {"app.py": f"def main():\n{body}    return value_0\n\n\ndef other():\n    pass\n"}, "initial")
+    new = commit_files(path, {"app.py": f"def main():\n{body.replace('value_9 = 9', 'value_9 = 90')}    return value_0\n\n\ndef other():\n    return 1\n", "new.txt": "added\n"}, "change")
+
+    result = asyncio.run(main.compare_git_changes(repo_url=f"file://{path}"))
+
+    assert result == git(path, "diff", "--no-renames", old, new)
+    assert "@@ def main():" in result
+
+
+def test_commit_graph_is_written_only_for_full_history(tmp_path):
+    url, _ = make_history(tmp_path)
+    repo = main.clone_repo(url, depth=2, single_branch=False)
+    graph = os.path.join(repo.git_dir, "objects", "info", "commit-graph")
+    assert not os.path.exists(graph)
+
+    # An ancestor beyond the shallow boundary pulls in the full history
+    assert compare(url, target="HEAD~3") == "notes.txt"
+
+    assert not main.is_shallow_repo(repo)
+    assert os.path.exists(graph)
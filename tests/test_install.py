@@ -0,0 +1,59 @@
+import io
+import os
+import zipfile
+
+from panopticon import main
+
+
+def test_install_pmd_on_linux(tmp_path, monkeypatch):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zip_file:
+        zip_file.writestr("pmd-bin-7.0.0-rc4/bin/pmd", "#!/bin/sh\necho pmd\n")
+    archive.seek(0)
+    requested = []
+
+    def fake_urlopen(url):
+        requested.append(url)
+        return archive
+
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setattr(main.platform, "system", lambda: "Linux")
+    monkeypatch.setattr(main.urllib.request, "urlopen", fake_urlopen)
+
+    main.install_pmd()
+
+    link = tmp_path / ".local" / "bin" / "pmd"
+    assert requested == ["https://github.com/pmd/pmd/releases/download/pmd_releases/7.0.0-rc4/pmd-bin-7.0.0-rc4.zip"]
+    assert os.path.islink(link)
+    assert os.access(link, os.X_OK)
+    assert (tmp_path / ".bashrc").read_text().strip() == f'export PATH="{tmp_path}/.local/bin:$PATH"'
+
+
+def test_failed_install_is_retried(monkeypatch):
+    monkeypatch.setattr(main, "CHECKED_TOOLS", set())
+    attempts = []
+
+    def install():
+        attempts.append(True)
+        if len(attempts) == 1:
+            raise RuntimeError("mirror unreachable")
+
+    main.ensure_tool("pmd", lambda: False, install)
+    assert "pmd" not in main.CHECKED_TOOLS
+
+    main.ensure_tool("pmd", lambda: False, install)
+    main.ensure_tool("pmd", lambda: False, install)
+    assert "pmd" in main.CHECKED_TOOLS
+    assert len(attempts) == 2
+
+
+def test_installers_keep_off_the_stdio_stream(monkeypatch):
+    calls = []
+    monkeypatch.setattr(main.platform, "system", lambda: "Darwin")
+    monkeypatch.setattr(main.subprocess, "run", lambda *args, **kwargs: calls.append(kwargs))
+
+    main.install_pmd()
+    main.install_trivy()
+
+    assert all(call["stdin"] is main.subprocess.DEVNULL and call["stdout"] is main.subprocess.DEVNULL for call in calls)
+    assert len(calls) == 2
@@ -0,0 +1,14 @@
+from panopticon import main
+
+from conftest import FAKE_PMD
+
+
+def test_cache_hit_matches_fresh_run(java_repo, fake_tools):
+    fake_tools("pmd", FAKE_PMD)
+    repo = main.clone_repo(java_repo)
+
+    fresh = main.run_cached_language_analysis(repo.git_dir, repo.working_tree_dir, "java")
+    cached = main.run_cached_language_analysis(repo.git_dir, repo.working_tree_dir, "java")
+
+    assert fresh == cached
+    assert fresh["pmd"]["by_priority"] == {"3": 2}
@@ -0,0 +1,37 @@
+import asyncio
+import threading
+import time
+
+from panopticon import main
+
+
+def test_detection_shares_one_bounded_probe_pool(source_repo, monkeypatch):
+    """Concurrent detections probe files on the shared probe pool, never above its size."""
+    probe = main.probe_language_markers
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+    threads = set()
+
+    def counting_probe(candidate):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+            threads.add(threading.current_thread().name)
+        time.sleep(0.01)
+        with lock:
+            active -= 1
+        return probe(candidate)
+
+    monkeypatch.setattr(main, "probe_language_markers", counting_probe)
+    repo = main.clone_repo(source_repo)
+
+    async def detect_all():
+        return await asyncio.gather(*(main.run_blocking(main.detect_repository_languages, repo.working_tree_dir) for _ in range(40)))
+
+    results = asyncio.run(detect_all())
+
+    assert results == [{"python": 1.0}] * 40
+    assert peak <= main.PROBE_POOL._max_workers
+    assert all(name.startswith("argus-probe") for name in threads)
@@ -0,0 +1,57 @@
+import os
+
+from panopticon import main
+
+from conftest import FAKE_PMD, commit_files, git
+
+
+def test_duplicate_sources_are_analyzed_once(java_repo, fake_tools, tmp_path, monkeypatch):
+    fake_tools("pmd", FAKE_PMD.replace('list="$2"', 'list="$2"; cp "$2" "$PMD_LIST_COPY"'))
+    monkeypatch.setenv("PMD_LIST_COPY", str(tmp_path / "analyzed.txt"))
+
+    result = main.run_pmd_analysis(java_repo)
+
+    assert (tmp_path / "analyzed.txt").read_text().splitlines() == [os.path.join(java_repo, "src/App.java")]
+    assert result["by_file"] == {"src/App.java": 1, "vendor/App.java": 1}
+    assert result["total_violations"] == 2
+
+
+def test_paths_are_relative_through_symlinks(java_repo, fake_tools, tmp_path):
+    fake_tools("pmd", FAKE_PMD)
+    link = tmp_path / "linked"
+    link.symlink_to(java_repo)
+
+    result = main.run_pmd_analysis(str(link))
+
+    assert set(result["by_file"]) == {"src/App.java", "vendor/App.java"}
+
+
+def test_no_java_sources_skips_pmd(source_repo, fake_tools):
+    fake_tools("pmd", "exit 1")
+
+    result = main.run_pmd_analysis(source_repo)
+
+    assert result["violations"] == [] and result["total_violations"] == 0
+
+
+def test_only_java_files_are_given_to_pmd(java_repo, fake_tools, tmp_path, monkeypatch):
+    fake_tools("pmd", FAKE_PMD.replace('list="$2"', 'list="$2"; cp "$2" "$PMD_LIST_COPY"'))
+    monkeypatch.setenv("PMD_LIST_COPY", str(tmp_path / "analyzed.txt"))
+    commit_files(java_repo, {"src/Tool.kt": "fun main() {}\n", "src/Build.scala": "object Build\n"}, "other jvm")
+
+    result = main.run_pmd_analysis(java_repo)
+
+    assert (tmp_path / "analyzed.txt").read_text().splitlines() == [os.path.join(java_repo, "src/App.java")]
+    assert set(result["by_file"]) == {"src/App.java", "vendor/App.java"}
+
+
+def test_kotlin_only_repository_skips_pmd(tmp_path, fake_tools):
+    fake_tools("pmd", "exit 1")
+    path = str(tmp_path / "kotlin")
+    os.makedirs(path)
+    git(path, "init", "-q", "-b", "main")
+    commit_files(path, {"src/Main.kt": "fun main() {}\n"}, "initial")
+
+    result = main.run_pmd_analysis(path)
+
+    assert result["violations"] == [] and result["total_violations"] == 0
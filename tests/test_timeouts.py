@@ -0,0 +1,73 @@
+import asyncio
+import subprocess
+import time
+
+import pytest
+
+from panopticon import main
+
+from conftest import RecordingContext
+
+
+def process_is_gone(pid):
+    """Check whether a process has exited, counting an unreaped zombie as gone."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] == "Z"
+    except FileNotFoundError:
+        return True
+
+
+def wait_until_gone(pid, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not process_is_gone(pid) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return process_is_gone(pid)
+
+
+def test_timed_out_tool_is_stopped_with_its_children(tmp_path, fake_tools, monkeypatch):
+    """A tool over its deadline raises TimeoutExpired and the workers it forked are stopped too."""
+    pid_file = tmp_path / "worker.pid"
+    fake_tools("pylint", f"sleep 30 & echo $! > {pid_file}; wait")
+    monkeypatch.setitem(main.TOOL_TIMEOUT_SECONDS, "pylint", 0.5)
+
+    started = time.monotonic()
+    with pytest.raises(subprocess.TimeoutExpired):
+        with main.open_tool_process(["pylint"], stdout=subprocess.PIPE) as process:
+            process.stdout.read()
+
+    assert time.monotonic() - started < 5
+    assert wait_until_gone(int(pid_file.read_text()))
+
+
+def test_tool_ignoring_sigterm_is_killed(tmp_path, fake_tools, monkeypatch):
+    """A tool that traps SIGTERM is killed once the stop grace period runs out."""
+    fake_tools("pylint", "trap '' TERM; while :; do sleep 0.1; done")
+    monkeypatch.setitem(main.TOOL_TIMEOUT_SECONDS, "pylint", 0.5)
+    monkeypatch.setattr(main, "TOOL_STOP_GRACE_SECONDS", 0.5)
+
+    started = time.monotonic()
+    with pytest.raises(subprocess.TimeoutExpired):
+        with main.open_tool_process(["pylint"], stdout=subprocess.DEVNULL) as process:
+            pid = process.pid
+
+    assert time.monotonic() - started < 5
+    assert wait_until_gone(pid)
+
+
+def test_timed_out_analyzer_is_reported_and_not_cached(source_repo, fake_tools, monkeypatch):
+    """A hung linter fills in only its own entry, and the report is computed again next time."""
+    fake_tools("pylint", "sleep 30")
+    monkeypatch.setitem(main.TOOL_TIMEOUT_SECONDS, "pylint", 0.5)
+    # A fresh Trivy DB lets the report be cached if nothing in it failed
+    main.run_trivy_scan(source_repo)
+
+    for _ in range(2):
+        ctx = RecordingContext()
+        result = asyncio.run(main.analyze_code_quality(repo_url=source_repo, language="python", ctx=ctx))
+
+        assert "timed out" in result["analysis"]["python"]["pylint"]["error"]
+        assert result["analysis"]["python"]["bandit"] == {"results": []}
+        assert result["security_scan"]["Results"][0]["Vulnerabilities"][0]["VulnerabilityID"] == "CVE-1"
+        # Every component ran again, rather than the failed report being served from the cache
+        assert ctx.progress == [(1, 2), (2, 2)]
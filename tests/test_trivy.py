@@ -0,0 +1,42 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from panopticon import main
+
+
+def test_scans_share_one_db_download_and_run_in_parallel(tmp_path, fake_tools, monkeypatch):
+    """A stale DB is downloaded once under the lock and the scans then run side by side."""
+    log = tmp_path / "trivy.log"
+    fake_tools("trivy", f"""
+case "$*" in
+  *--download-db-only*) echo download >> {log}; sleep 0.3; exit 0 ;;
+esac
+case "$*" in *--skip-db-update*) ;; *) echo unexpected >> {log} ;; esac
+echo scan >> {log}
+sleep 0.5
+echo '{{"Results": []}}'""")
+    monkeypatch.setattr(main, "TRIVY_CACHE_DIR", str(tmp_path / "trivy-cache"))
+    monkeypatch.setattr(main, "TRIVY_SERVER", None)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(main.run_trivy_scan, [str(tmp_path)] * 4))
+    elapsed = time.monotonic() - started
+
+    assert all("error" not in result for result in results)
+    assert log.read_text().split().count("download") == 1
+    assert log.read_text().split().count("scan") == 4
+    assert "unexpected" not in log.read_text()
+    assert elapsed < 0.3 + 4 * 0.5
+
+
+def test_failed_db_download_is_reported_and_retried(tmp_path, fake_tools, monkeypatch):
+    """A failed DB download returns an error and does not mark the DB fresh."""
+    fake_tools("trivy", """echo 'registry unreachable' >&2; exit 1""")
+    monkeypatch.setattr(main, "TRIVY_CACHE_DIR", str(tmp_path / "trivy-cache"))
+    monkeypatch.setattr(main, "TRIVY_SERVER", None)
+
+    result = main.run_trivy_scan(str(tmp_path))
+
+    assert "registry unreachable" in result["error"]
+    assert not main.trivy_db_is_fresh()
@@ -0,0 +1,67 @@
+import asyncio
+import os
+import time
+
+from panopticon import main
+
+from conftest import git
+
+
+def test_concurrent_worktrees_of_one_clone(source_repo):
+    """Worktrees added and removed at the same time all check out and are all cleaned up."""
+    repo = main.clone_repo(source_repo)
+
+    async def read_worktree():
+        async with main.worktree_checkout(repo) as path:
+            with open(os.path.join(path, "README.md")) as f:
+                return path, f.read()
+
+    async def run_checkouts():
+        return await asyncio.gather(*(read_worktree() for _ in range(20)))
+
+    results = asyncio.run(run_checkouts())
+
+    assert [content for _, content in results] == ["hello\n"] * 20
+    assert not any(os.path.exists(path) for path, _ in results)
+    assert len(git(repo.working_tree_dir, "worktree", "list").splitlines()) == 1
+
+
+def wait_until_removed(path, timeout=10):
+    deadline = time.monotonic() + timeout
+    while os.path.exists(path) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return not os.path.exists(path)
+
+
+def test_sweep_removes_worktrees_of_exited_processes():
+    """Worktree directories whose process is gone are deleted at the next startup sweep."""
+    orphan = os.path.join(main.CACHE_DIR, f"{main.WORKTREE_PREFIX}orphan")
+    os.makedirs(os.path.join(orphan, "checkout", "src"))
+    open(f"{orphan}.lock", "w").close()
+
+    main.sweep_discarded_directories()
+
+    assert wait_until_removed(orphan)
+    assert wait_until_removed(f"{orphan}.lock")
+
+
+def test_sweep_keeps_worktrees_of_running_processes(source_repo):
+    """Starting another process does not delete the checkouts this one is reading."""
+    repo = main.clone_repo(source_repo)
+    path = main.add_worktree(repo)
+    # Stands in for a second process sharing the cache directory
+    other, other_lock = main.open_worktree_root()
+    try:
+        main.sweep_discarded_directories()
+        main.IO_POOL.submit(lambda: None).result()
+        time.sleep(0.2)
+
+        assert os.path.isfile(os.path.join(path, "README.md"))
+        assert os.path.isdir(other)
+    finally:
+        main.remove_worktree(repo, path)
+        other_lock.close()
+
+    # Once the other process has exited, its directory is reaped
+    main.sweep_discarded_directories()
+    assert wait_until_removed(other)